@@ -0,0 +1,161 @@
+import pandas as pd
+
+from utils import parse_date_series
+
+# Porcentaje mínimo de asistencia para mantener la regularidad
+REGULARITY_THRESHOLD = 75
+
+def _text_key(series):
+    # Claves de join homogéneas aunque las tablas vengan compactadas (int64/categorías)
+    return series.astype(str).str.strip()
+
+def _date_key(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.normalize()
+    return parse_date_series(series)
+
+def expand_schedule_sessions(schedule_df, until=None):
+    """
+    Sesiones de clase programadas: una fila por (MATERIA, COMISION, FECHA)
+    Parameters:
+        until (datetime.date): si se indica, solo las sesiones hasta esa fecha inclusive
+    """
+    if schedule_df.empty:
+        return pd.DataFrame(columns=['MATERIA', 'COMISION', 'FECHA'])
+
+    sessions = pd.DataFrame({
+        'MATERIA': _text_key(schedule_df['MATERIA']),
+        'COMISION': _text_key(schedule_df['COMISION']),
+        'FECHA': parse_date_series(schedule_df['FECHA']),
+    }).dropna(subset=['FECHA'])
+
+    if until is not None:
+        sessions = sessions[sessions['FECHA'] <= pd.Timestamp(until)]
+    return sessions.drop_duplicates().reset_index(drop=True)
+
+def enrolled_students(students_df):
+    """Inscripciones de estudiantes: una fila por (DNI, MATERIA, COMISION)"""
+    if students_df.empty:
+        return pd.DataFrame(columns=['DNI', 'APELLIDO Y NOMBRE', 'MATERIA', 'COMISION'])
+    return pd.DataFrame({
+        'DNI': _text_key(students_df['dni']),
+        'APELLIDO Y NOMBRE': students_df['apellido_nombre'].astype(str),
+        'MATERIA': _text_key(students_df['materia']),
+        'COMISION': _text_key(students_df['comision']),
+    }).drop_duplicates(subset=['DNI', 'MATERIA', 'COMISION']).reset_index(drop=True)
+
+def attended_sessions(attendance_df, sessions):
+    """Asistencias que corresponden a una sesión programada, sin duplicados"""
+    if attendance_df.empty or sessions.empty:
+        return pd.DataFrame(columns=['DNI', 'MATERIA', 'COMISION', 'FECHA'])
+    attendance = pd.DataFrame({
+        'DNI': _text_key(attendance_df['DNI']),
+        'MATERIA': _text_key(attendance_df['MATERIA']),
+        'COMISION': _text_key(attendance_df['COMISION']),
+        'FECHA': _date_key(attendance_df['FECHA']),
+    })
+    return attendance.merge(sessions, on=['MATERIA', 'COMISION', 'FECHA']).drop_duplicates()
+
+def attendance_matrix(students_df, schedule_df, attendance_df, until=None):
+    """
+    Asistencia por estudiante y (materia, comisión): sesiones asistidas contra programadas
+    Returns:
+        DataFrame con DNI, APELLIDO Y NOMBRE, MATERIA, COMISION, ASISTIDAS, PROGRAMADAS y PORCENTAJE
+    """
+    sessions = expand_schedule_sessions(schedule_df, until)
+    enrolled = enrolled_students(students_df)
+
+    scheduled = sessions.groupby(['MATERIA', 'COMISION']).size().rename('PROGRAMADAS').reset_index()
+    attended = attended_sessions(attendance_df, sessions)\
+        .groupby(['DNI', 'MATERIA', 'COMISION']).size().rename('ASISTIDAS').reset_index()
+
+    matrix = enrolled.merge(scheduled, on=['MATERIA', 'COMISION'], how='left')\
+        .merge(attended, on=['DNI', 'MATERIA', 'COMISION'], how='left')
+    matrix['PROGRAMADAS'] = matrix['PROGRAMADAS'].fillna(0).astype('int64')
+    matrix['ASISTIDAS'] = matrix['ASISTIDAS'].fillna(0).astype('int64')
+    matrix['PORCENTAJE'] = _percentage(matrix['ASISTIDAS'], matrix['PROGRAMADAS'])
+    return matrix
+
+def _percentage(attended, scheduled):
+    return (attended / scheduled.where(scheduled > 0) * 100).round(1)
+
+def build_matrix_state(students_df, schedule_df, attendance_df, as_of):
+    """
+    Estado incremental de la matriz de asistencia
+    Guarda la matriz indexada por (DNI, MATERIA, COMISION), las sesiones programadas
+    y las asistencias ya contadas, para poder sumar registros nuevos sin recalcular
+    """
+    sessions = expand_schedule_sessions(schedule_df, as_of)
+    matrix = attendance_matrix(students_df, schedule_df, attendance_df, as_of)
+    counted = attended_sessions(attendance_df, sessions)
+    return {
+        'as_of': as_of,
+        'matrix': matrix.set_index(['DNI', 'MATERIA', 'COMISION']).sort_index(),
+        'sessions': set(zip(sessions['MATERIA'], sessions['COMISION'], sessions['FECHA'])),
+        'counted': set(zip(counted['DNI'], counted['MATERIA'], counted['COMISION'], counted['FECHA'])),
+    }
+
+def apply_attendance_increment(state, dni, subject, commission, date):
+    """
+    Sumar un registro de asistencia nuevo a la matriz
+    Returns:
+        bool: True si el registro modificó la matriz
+    """
+    if isinstance(date, str):
+        date = parse_date_series([date]).iloc[0]
+    date = pd.Timestamp(date).normalize()
+    key = (str(dni).strip(), str(subject).strip(), str(commission).strip())
+
+    if (key[1], key[2], date) not in state['sessions'] or key + (date,) in state['counted']:
+        return False
+    if key not in state['matrix'].index:
+        return False
+
+    state['counted'].add(key + (date,))
+    matrix = state['matrix']
+    attended = matrix.at[key, 'ASISTIDAS'] + 1
+    matrix.at[key, 'ASISTIDAS'] = attended
+    scheduled = matrix.at[key, 'PROGRAMADAS']
+    matrix.at[key, 'PORCENTAJE'] = round(attended / scheduled * 100, 1) if scheduled else float('nan')
+    return True
+
+def absence_roster(students_df, schedule_df, attendance_df, date_from=None, date_to=None,
+                   subject=None, commission=None):
+    """
+    Ausentes por sesión: inscriptos en (materia, comisión) sin asistencia en la fecha de la clase
+    Se resuelve con un único anti-join entre inscripciones x sesiones y asistencias
+    Parameters:
+        date_from, date_to (datetime.date): período, ambos inclusive
+        subject, commission (str): filtros opcionales
+    Returns:
+        DataFrame con FECHA, MATERIA, COMISION, DNI y APELLIDO Y NOMBRE
+    """
+    columns = ['FECHA', 'MATERIA', 'COMISION', 'DNI', 'APELLIDO Y NOMBRE']
+    sessions = expand_schedule_sessions(schedule_df, date_to)
+    if date_from is not None:
+        sessions = sessions[sessions['FECHA'] >= pd.Timestamp(date_from)]
+    if subject:
+        sessions = sessions[sessions['MATERIA'] == str(subject).strip()]
+    if commission:
+        sessions = sessions[sessions['COMISION'] == str(commission).strip()]
+    if sessions.empty:
+        return pd.DataFrame(columns=columns)
+
+    expected = enrolled_students(students_df).merge(sessions, on=['MATERIA', 'COMISION'])
+    present = attended_sessions(attendance_df, sessions)
+    absent = expected.merge(present, on=['DNI', 'MATERIA', 'COMISION', 'FECHA'], how='left', indicator=True)
+    absent = absent[absent['_merge'] == 'left_only']
+
+    absent = absent.sort_values(['FECHA', 'MATERIA', 'COMISION', 'APELLIDO Y NOMBRE'])[columns]
+    absent['FECHA'] = absent['FECHA'].dt.strftime('%Y-%m-%d')
+    return absent.reset_index(drop=True)
+
+def percentage_pivot(matrix):
+    """Vista estudiante x (materia - comisión) con el porcentaje de asistencia"""
+    if matrix.empty:
+        return pd.DataFrame()
+    matrix = matrix.reset_index() if 'DNI' not in matrix.columns else matrix
+    columns = matrix['MATERIA'] + ' - ' + matrix['COMISION']
+    return matrix.assign(CLASE=columns).pivot_table(
+        index=['DNI', 'APELLIDO Y NOMBRE'], columns='CLASE', values='PORCENTAJE', aggfunc='first'
+    )
@@ -1,20 +1,14 @@
 
-import qrcode
 import streamlit as st
-from functools import lru_cache
 import pandas as pd
 import datetime
 import os
 import socket
 import random
 import string
-from io import BytesIO
+import time
+import threading
 from pathlib import Path
-from PIL import Image
-from pyzbar.pyzbar import decode
-import io
-import numpy as np
-import cv2
 
 # MOVER set_page_config AL INICIO - DEBE SER EL PRIMER COMANDO DE STREAMLIT
 # AL INICIO del archivo, después de imports:
@@ -29,18 +23,38 @@ st.set_page_config(
 if 'performance_mode' not in st.session_state:
     st.session_state.performance_mode = True
 
-from utils import validate_time_for_subject, detect_mobile_device
+from utils import (
+    is_class_open, detect_mobile_device,
+    search_dni_prefix, classes_on_date, dni_mask
+)
 from network import (
-    check_wifi_connection, is_ip_in_allowed_range, get_local_ip, 
-    get_argentina_datetime, get_device_id, get_device_id_from_phone,
-    generate_session_device_id
+    is_ip_in_allowed_range, analyze_ip_ranges, parse_ip_range, client_ip_from_context,
+    DEFAULT_TRUSTED_PROXIES, get_argentina_datetime, device_fingerprint
+)
+from qr_codes import (
+    decode_qr_in_pool, extract_classroom_code, get_decode_pool_metrics,
+    render_qr_png, render_qr_batch, build_qr_zip, build_qr_sheet_pdf
+)
+from qr_scanner import qr_scanner
+from device_token import device_token
+from rotating_codes import (
+    is_rotating_mode_enabled, current_rotating_code, verify_rotating_code, ROTATION_STEP_SECONDS
 )
 # Importamos todas las funciones de database
 from database import (
-    load_students, load_attendance, load_schedule, load_admin_config, 
     update_admin_config, save_verification_code, save_classroom_code,
     verify_classroom_code, is_attendance_registered, save_attendance,
-    validate_device_for_subject, get_supabase_client
+    validate_device_for_subject, get_supabase_client, get_attendance_page,
+    register_attendance_transaction, ATTENDANCE_PAGE_SIZE
+)
+from schedule_index import find_schedule_conflicts
+from analytics import (
+    build_matrix_state, apply_attendance_increment, percentage_pivot, REGULARITY_THRESHOLD
+)
+from data_layer import (
+    get_students, get_schedule, get_attendance, get_admin_config, get_memory_report,
+    get_dni_index, get_student_enrollments, get_schedule_catalog, get_schedule_index, get_class_times,
+    apply_schedule_change, snapshot_summary, data_version, load_view, invalidate
 )
 
 # [Configuración inicial de Streamlit...]
@@ -48,19 +62,6 @@ from database import (
 if not os.environ.get('STREAMLIT_SHARING'):
     os.environ['STREAMLIT_SHARING'] = 'true'
 
-# 1. CACHEAR DATOS PESADOS
-@st.cache_data(ttl=300, show_spinner="Cargando estudiantes...")
-def load_students_cached():
-    return load_students()
-
-@st.cache_data(ttl=300, show_spinner="Cargando horarios...")  
-def load_schedule_cached():
-    return load_schedule()
-
-@st.cache_data(ttl=60, show_spinner="Cargando asistencia...")
-def load_attendance_cached():
-    return load_attendance()
-
 # FUNCIÓN SIDEBAR CORREGIDA
 def sidebar():
     with st.sidebar:
@@ -96,6 +97,7 @@ def initialize_session_state():
     defaults = {
         'attendance_registered': False,
         'registration_info': {},
+        'logout_deadline': None,
         'authenticated': False,
         'student_data': None,
         'admin_mode': False,
@@ -103,13 +105,11 @@ def initialize_session_state():
         'verification_step': False,
         'verification_code': None,
         'phone_verified': False,
-        'device_id': get_device_id(),
+        'device_id': None,
+        'device_token': None,
         'data_loaded': False,
-        'students_df': None,
-        'schedule_df': None,
-        'attendance_loaded': False,  # NUEVO
-        'filtered_attendance': None,  # NUEVO
-        'last_filter': None,  # NUEVO
+        'attendance_filters': None,
+        'attendance_cursors': [None],
         'initialized': True  # NUEVO
     }
     
@@ -119,25 +119,97 @@ def initialize_session_state():
             st.session_state[key] = value
 
 # 3. CARGAR DATOS UNA SOLA VEZ
-@st.cache_data(ttl=300)
-def get_cached_data():
-    """Cargar todos los datos de una vez y cachearlos juntos"""
-    return {
-        'students': load_students(),
-        'schedule': load_schedule(),
-        'attendance': load_attendance()
-    }
-
-def load_data_once():
-    """Cargar datos solo si no están en session state"""
+def load_data_once(view='student_registration'):
+    """
+    Asegurar que estén cargadas las instantáneas que usa la vista (ver VIEW_TABLES)
+    La sesión no guarda los DataFrames: cada lectura toma la instantánea vigente
+    """
     if not st.session_state.get('data_loaded', False):
         with st.spinner("Cargando datos del sistema..."):
-            cached_data = get_cached_data()
-            st.session_state.students_df = cached_data['students']
-            st.session_state.schedule_df = cached_data['schedule']
-            st.session_state.attendance_df = cached_data['attendance']
+            load_view(view)
             st.session_state.data_loaded = True
 
+# Matriz de asistencia por estudiante, compartida por todas las sesiones
+# Se recalcula completa cada MATRIX_REFRESH_SECONDS para incluir registros hechos desde otros procesos
+MATRIX_REFRESH_SECONDS = 300
+
+@st.cache_resource
+def get_attendance_matrix_store():
+    # pending: registros sumados mientras se recalcula la matriz (None si no hay recálculo en curso)
+    return {
+        'lock': threading.Lock(), 'build_lock': threading.Lock(),
+        'state': None, 'version': None, 'built_at': 0, 'pending': None
+    }
+
+def _matrix_is_stale(store, today, version):
+    state = store['state']
+    return (state is None or state['as_of'] != today or store['version'] != version
+            or time.time() - store['built_at'] > MATRIX_REFRESH_SECONDS)
+
+def _rebuild_attendance_matrix(store, today, version):
+    """
+    Recalcular la matriz fuera de store['lock'] y reemplazarla al terminar
+    Los registros sumados durante el recálculo se vuelven a aplicar sobre la matriz nueva;
+    los que ya estaban en la asistencia leída no se cuentan dos veces (state['counted'])
+    """
+    with store['lock']:
+        store['pending'] = []
+    try:
+        state = build_matrix_state(get_students(), get_schedule(), get_attendance(), today)
+        with store['lock']:
+            for dni, subject, commission, date in store['pending']:
+                if date == today:
+                    apply_attendance_increment(state, dni, subject, commission, date)
+            store['state'] = state
+            store['version'] = version
+            store['built_at'] = time.time()
+    finally:
+        with store['lock']:
+            store['pending'] = None
+
+def get_attendance_matrix():
+    """
+    Matriz de asistencia al día de hoy
+    Se recalcula completa solo cuando cambian estudiantes u horarios, el día o pasa el
+    período de refresco; los registros nuevos se suman con record_attendance_in_matrix
+    Mientras una sesión la recalcula, las demás usan la anterior si es del mismo día
+    """
+    _, today, _ = get_argentina_datetime()
+    version = data_version()
+    store = get_attendance_matrix_store()
+    with store['lock']:
+        stale = _matrix_is_stale(store, today, version)
+        usable = store['state'] is not None and store['state']['as_of'] == today
+
+    if stale and store['build_lock'].acquire(blocking=not usable):
+        try:
+            with store['lock']:
+                stale = _matrix_is_stale(store, today, version)
+            if stale:
+                _rebuild_attendance_matrix(store, today, version)
+        finally:
+            store['build_lock'].release()
+
+    with store['lock']:
+        return store['state']['matrix'].copy()
+
+def record_attendance_in_matrix(dni, subject, commission, date):
+    """Sumar un registro recién guardado a la matriz, si ya está calculada"""
+    store = get_attendance_matrix_store()
+    with store['lock']:
+        if store['pending'] is not None:
+            store['pending'].append((dni, subject, commission, date))
+        state = store['state']
+        if state is not None and state['as_of'] == date:
+            apply_attendance_increment(state, dni, subject, commission, date)
+
+# Segundos hasta el cierre automático después de registrar asistencia
+AUTO_LOGOUT_SECONDS = 15
+
+# Búsqueda de DNI por prefijo
+MIN_DNI_PREFIX = 3
+DNI_SUGGESTIONS = 5
+
 # Crear función para generar código aleatorio
 def generate_classroom_code():
     """Generar código aleatorio alfanumérico de 6 caracteres"""
@@ -147,21 +219,27 @@ def generate_classroom_code():
 # Función para crear código QR
 def create_qr_code(data):
     """Generar imagen de código QR"""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
+    # Renderizado cacheado por contenido (LRU en qr_codes)
+    return render_qr_png(data)
+
+@st.fragment(run_every=5)
+def rotating_qr_display(subject, commission):
+    """Mostrar el QR rotativo vigente; se actualiza solo sin recargar la página"""
+    code, remaining = current_rotating_code(subject, commission)
     
-    # Convertir a bytes para Streamlit
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    return buffered.getvalue()
+    st.success(f"Código actual: {code}")
+    st.image(create_qr_code(f"{code}|{subject}|{commission}"), caption="Código QR para escanear")
+    st.caption(f"El código cambia cada {ROTATION_STEP_SECONDS} segundos (próximo cambio en {remaining} s)")
+
+def verify_attendance_code(code, subject, commission):
+    """
+    Verificar el código ingresado por el estudiante
+    Los códigos rotativos se validan sin consultar la base de datos;
+    si no coincide se busca entre los códigos guardados
+    """
+    if verify_rotating_code(code, subject, commission):
+        return True
+    return verify_classroom_code(code, subject, commission)
 
 # Función para procesar código QR
 def process_qr_code(uploaded_file):
@@ -169,57 +247,68 @@ def process_qr_code(uploaded_file):
     try:
         if uploaded_file is None:
             return None
-            
-        # Convertir el archivo subido a un formato que pyzbar pueda procesar
-        image_bytes = uploaded_file.getvalue()
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # También probar con OpenCV para mejorar la detección
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img_cv = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
         
-        # Intentar decodificar primero con PIL
-        decoded_objects = decode(image)
+        # Decodificación por etapas en el pool de procesos, fuera del hilo del script
+        status, qr_data, stage, timings = decode_qr_in_pool(uploaded_file.getvalue())
+        st.session_state.qr_decode_stats = {"status": status, "stage": stage, "timings_ms": timings}
         
-        # Si no funciona con PIL, intentar con OpenCV
-        if not decoded_objects:
-            # Aplicar umbral adaptativo para mejorar la calidad
-            img_cv = cv2.adaptiveThreshold(img_cv, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                          cv2.THRESH_BINARY, 11, 2)
-            decoded_objects = decode(Image.fromarray(img_cv))
+        if status in ("saturated", "timeout"):
+            st.warning("El servidor está procesando muchos códigos QR en este momento. "
+                       "Por favor, ingrese el código manualmente.")
+            return None
         
-        if decoded_objects:
-            qr_data = decoded_objects[0].data.decode('utf-8')
-            
-            # Si es un código de clase, podría tener formato: "CODIGO|MATERIA|COMISION"
-            try:
-                parts = qr_data.split('|')
-                if len(parts) >= 1:
-                    # Retornar solo el código (primera parte)
-                    return parts[0]
-                else:
-                    return qr_data
-            except:
-                return qr_data
+        if qr_data:
+            # Si es un código de clase, tiene formato: "CODIGO|MATERIA|COMISION"
+            return extract_classroom_code(qr_data)
         else:
             return None
     except Exception as e:
         st.error(f"Error al procesar el código QR: {str(e)}")
         return None
 
+def scan_classroom_qr(key):
+    """
+    Leer el QR de la clase: primero en el navegador (solo viaja el código decodificado)
+    y, como alternativa, con una foto decodificada en el servidor
+    Returns:
+        tuple (código extraído o None, True si hubo un intento de lectura)
+    """
+    use_photo = st.toggle("Tomar una foto en lugar de usar el escáner", key=f"{key}_use_photo")
+    
+    if not use_photo:
+        scanned = qr_scanner(key=f"{key}_scanner")
+        if scanned:
+            return extract_classroom_code(scanned), True
+        return None, False
+    
+    uploaded_file = st.camera_input("Tomar foto del código QR", key=f"{key}_camera")
+    if uploaded_file is not None:
+        return process_qr_code(uploaded_file), True
+    return None, False
+
 # Función para validar red
-# CACHE para validaciones de red
-@st.cache_data(ttl=60)  # Cache por 1 minuto
-def validate_network_cached():
-    admin_config = load_admin_config()
+# La configuración se lee de la capa de datos (cacheada por versión)
+def get_network_config_cached():
+    admin_config = get_admin_config()
     allowed_ranges = admin_config.get("allowed_ip_ranges", ["192.168.1.0/24"])
+    trusted_proxies = admin_config.get("trusted_proxies") or list(DEFAULT_TRUSTED_PROXIES)
+    return tuple(allowed_ranges), tuple(trusted_proxies)
+
+def get_client_ip():
+    """IP del estudiante según la conexión de esta sesión, calculada una sola vez"""
+    if st.session_state.get('client_ip') is None:
+        _, trusted_proxies = get_network_config_cached()
+        st.session_state.client_ip = client_ip_from_context(st.context, trusted_proxies)
+    return st.session_state.client_ip
+
+def validate_client_network(client_ip):
+    allowed_ranges, _ = get_network_config_cached()
+    
+    if client_ip is None:
+        return False, "❌ No se pudo determinar su dirección IP"
     
-    client_ip = get_local_ip()
-    if client_ip == "127.0.0.1" or client_ip.startswith("localhost"):
+    if client_ip == "127.0.0.1" or client_ip == "::1":
         return True, "Modo desarrollo local"
-        
-    if not check_wifi_connection():
-        return False, "❌ Debe estar conectado a una red WiFi"
     
     if not is_ip_in_allowed_range(client_ip, allowed_ranges):
         return False, f"❌ Su dirección IP ({client_ip}) está fuera del rango permitido"
@@ -228,7 +317,7 @@ def validate_network_cached():
 
 # USAR en lugar de validate_network():
 def validate_network():
-    is_valid, message = validate_network_cached()
+    is_valid, message = validate_client_network(get_client_ip())
     if not is_valid:
         st.error(message)
     elif "desarrollo" in message:
@@ -249,79 +338,6 @@ def phone_verification(dni, phone):
     st.success("Verificación completada")
     st.rerun()
 
-def register_attendance_transaction(dni, name, subject, commission, date, time, device, ip, device_id):
-    """Guardar registro de asistencia usando una transacción para evitar duplicados"""
-    supabase = get_supabase_client()
-    if not supabase:
-        return False, "No se pudo conectar a la base de datos"
-    
-    # Asegurar formato de fecha para Supabase
-    if isinstance(date, str) and '/' in date:
-        # Convertir dd/mm/yyyy a formato ISO
-        date_parts = date.split('/')
-        date = f"{date_parts[2]}-{date_parts[1]}-{date_parts[0]}"
-    
-    try:
-        # Verificar si el dispositivo ya fue usado para esta materia y fecha
-        device_check = supabase.table('device_usage')\
-            .select('*')\
-            .eq('DEVICE_ID', device_id)\
-            .eq('MATERIA', subject)\
-            .eq('FECHA', date)\
-            .execute()
-        
-        if len(device_check.data) > 0:
-            return False, "Este dispositivo ya ha sido utilizado para registrar asistencia en esta materia y fecha"
-        
-        # Verificar si la asistencia ya está registrada
-        attendance_check = supabase.table('attendance')\
-            .select('*')\
-            .eq('DNI', dni)\
-            .eq('MATERIA', subject)\
-            .eq('FECHA', date)\
-            .execute()
-        
-        if len(attendance_check.data) > 0:
-            return False, "Ya registraste tu asistencia para esta materia y fecha"
-        
-        # Datos a insertar
-        attendance_data = {
-            'DNI': dni,
-            'APELLIDO Y NOMBRE': name,
-            'MATERIA': subject,
-            'COMISION': commission,
-            'FECHA': date,
-            'HORA': time,
-            'DISPOSITIVO': device,
-            'IP': ip,
-            'DEVICE_ID': device_id
-        }
-        
-        device_data = {
-            'DEVICE_ID': device_id,
-            'DNI': dni,
-            'MATERIA': subject,
-            'FECHA': date,
-            'TIMESTAMP': datetime.datetime.now().isoformat()
-        }
-        
-        # Realizar ambas inserciones
-        supabase.table('attendance').insert(attendance_data).execute()
-        supabase.table('device_usage').insert(device_data).execute()
-        
-        return True, "Asistencia registrada correctamente"
-        
-    except Exception as e:
-        error_msg = str(e)
-        # Si es error de clave duplicada
-        if "23505" in error_msg:
-            if "device_usage" in error_msg:
-                return False, "Este dispositivo ya fue utilizado para registrar asistencia en esta materia y fecha"
-            else:
-                return False, "Ya existe un registro con estos datos"
-        else:
-            return False, f"Error al registrar asistencia: {error_msg}"
-
 # Para utilizarse en la función de la aplicación principal:
 def register_attendance_function(selected_dni, student_name, selected_subject, commission, current_date, current_time, device_info):
     success, message = register_attendance_transaction(
@@ -337,6 +353,7 @@ def register_attendance_function(selected_dni, student_name, selected_subject, c
     )
     
     if success:
+        record_attendance_in_matrix(selected_dni, selected_subject, commission, current_date)
         st.session_state.attendance_registered = True
         st.session_state.registration_info = {
             "student_name": student_name,
@@ -351,18 +368,82 @@ def register_attendance_function(selected_dni, student_name, selected_subject, c
 
 # 4. OPTIMIZAR STUDENT_LOGIN
 # AGREGAR estas funciones optimizadas:
-@st.cache_data(ttl=300)
-def get_student_subjects_cached(dni, students_df):
-    """Cache de materias por estudiante"""
-    return students_df[students_df["dni"].astype(str) == dni]["materia"].unique().tolist()
+def get_student_subjects(dni):
+    """Materias del estudiante, desde el índice de inscripciones compartido"""
+    return list(dict.fromkeys(subject for subject, _ in get_student_enrollments(dni)))
+
+def get_student_commission(dni, subject):
+    """Comisión del estudiante en una materia"""
+    return next((commission for enrolled, commission in get_student_enrollments(dni) if enrolled == subject), None)
+
+def dni_picker():
+    """Entrada de DNI con sugerencias por prefijo"""
+    dni_query = st.text_input("Ingrese su DNI:", max_chars=12, key="dni_query").strip()
+    
+    if not dni_query:
+        return ""
+    
+    if len(dni_query) < MIN_DNI_PREFIX:
+        st.caption(f"Ingrese al menos {MIN_DNI_PREFIX} dígitos para buscar su DNI")
+        return ""
+    
+    matches = search_dni_prefix(get_dni_index(), dni_query, limit=DNI_SUGGESTIONS)
+    
+    if dni_query in matches:
+        return dni_query
+    if not matches:
+        st.error("DNI no encontrado en el sistema.")
+        return ""
+    
+    return st.selectbox("Seleccione su DNI:", [""] + matches, key="dni_suggestion")
+
+def get_browser_token():
+    """Token persistente del navegador (cookie o componente), resuelto una sola vez por sesión"""
+    if st.session_state.get('device_token') is None:
+        token = st.context.cookies.get('device_token') or device_token()
+        if token:
+            st.session_state.device_token = token
+    return st.session_state.device_token
+
+def get_device_fingerprint(phone):
+    """
+    ID de dispositivo memorizado por teléfono en la sesión, sin procesos externos
+    Returns:
+        str, o None mientras el navegador no envió su token
+    """
+    # Lo resuelve get_browser_token al inicio de la pantalla (el componente se dibuja una vez)
+    token = st.session_state.get('device_token')
+    if token is None:
+        return None
+    
+    fingerprints = st.session_state.setdefault('device_fingerprints', {})
+    if phone not in fingerprints:
+        fingerprints[phone] = device_fingerprint(token, phone)
+    return fingerprints[phone]
+
+def reset_student_session():
+    """Limpiar las variables de sesión del estudiante y volver al inicio"""
+    st.session_state.authenticated = False
+    st.session_state.student_data = None
+    st.session_state.verification_step = False
+    st.session_state.verification_code = None
+    st.session_state.phone_verified = False
+    st.session_state.attendance_registered = False
+    st.session_state.registration_info = {}
+    st.session_state.logout_deadline = None
+
+@st.fragment(run_every=1)
+def auto_logout_countdown():
+    """Cuenta regresiva de cierre automático tras registrar la asistencia"""
+    remaining = int(round((st.session_state.get('logout_deadline') or 0) - time.time()))
+    
+    if remaining <= 0:
+        # Después de la cuenta regresiva, limpia todo y regresa al inicio
+        reset_student_session()
+        st.rerun(scope="app")
+    
+    st.warning(f"Se cerrará automáticamente en {remaining} segundos...")
 
-@st.cache_data(ttl=300) 
-def get_student_commission_cached(dni, subject, students_df):
-    """Cache de comisión por estudiante y materia"""
-    result = students_df[(students_df["dni"].astype(str) == dni) & 
-                        (students_df["materia"] == subject)]["comision"]
-    return result.iloc[0] if not result.empty else None
-            
 def student_login_optimized():
     # Progress bar para carga inicial
     if not st.session_state.get('data_loaded', False):
@@ -371,7 +452,7 @@ def student_login_optimized():
         
         status_text.text('Cargando datos de estudiantes...')
         progress_bar.progress(25)
-        load_data_once()
+        load_data_once('student_registration')
         
         status_text.text('Validando red...')
         progress_bar.progress(50)
@@ -385,8 +466,8 @@ def student_login_optimized():
         progress_bar.empty()
         status_text.empty()
 
-    # Usar datos del session state
-    students_df = st.session_state.students_df
+    # Instantánea compartida de estudiantes (sin copia por sesión)
+    students_df = get_students()
         
     st.title("Sistema de Registro de Asistencia")
     
@@ -412,13 +493,7 @@ def student_login_optimized():
         with col1:
             if st.button("Salir", type="primary"):
                 # Limpiar todas las variables de sesión
-                st.session_state.authenticated = False
-                st.session_state.student_data = None
-                st.session_state.verification_step = False
-                st.session_state.verification_code = None
-                st.session_state.phone_verified = False
-                st.session_state.attendance_registered = False
-                st.session_state.registration_info = {}
+                reset_student_session()
                 st.rerun()
         
         with col2:
@@ -426,24 +501,14 @@ def student_login_optimized():
                 # Mantener algunas variables pero reiniciar el proceso
                 st.session_state.attendance_registered = False
                 st.session_state.registration_info = {}
+                st.session_state.logout_deadline = None
                 st.rerun()
         
         # Mensaje de redirección automática con contador
-        import time
-        placeholder = st.empty()
-        for i in range(15, 0, -1):
-            placeholder.warning(f"Se cerrará automáticamente en {i} segundos...")
-            time.sleep(1)
-        
-        # Después de la cuenta regresiva, limpia todo y regresa al inicio
-        st.session_state.authenticated = False
-        st.session_state.student_data = None
-        st.session_state.verification_step = False
-        st.session_state.verification_code = None
-        st.session_state.phone_verified = False
-        st.session_state.attendance_registered = False
-        st.session_state.registration_info = {}
-        st.rerun()
+        # El fragmento se re-ejecuta cada segundo sin bloquear el hilo del script
+        if not st.session_state.get('logout_deadline'):
+            st.session_state.logout_deadline = time.time() + AUTO_LOGOUT_SECONDS
+        auto_logout_countdown()
         
         # Detener la ejecución aquí para no mostrar el resto del formulario
         return
@@ -454,6 +519,7 @@ def student_login_optimized():
     st.info(f"Fecha actual: {current_date.strftime('%d/%m/%Y')} - Hora: {current_time.strftime('%H:%M:%S')} (Hora de Buenos Aires)")
     
     # Obtener ID del dispositivo
+    get_browser_token()
     device_id = st.session_state.device_id
     
     # Detectar si es dispositivo móvil
@@ -462,12 +528,12 @@ def student_login_optimized():
         st.warning("⚠️ Este sistema está diseñado para utilizarse desde un dispositivo móvil.")
     
     # IMPORTANTE: Usamos la columna correcta "dni" (minúscula) de acuerdo a la estructura de la BD
-    dni_list = [""] + sorted(students_df["dni"].astype(str).unique().tolist())
-    selected_dni = st.selectbox("Seleccione su DNI:", dni_list)
+    # Solo se envían al navegador las pocas coincidencias del prefijo, nunca el padrón completo
+    selected_dni = dni_picker()
     
     if selected_dni:
         # CORRECCIÓN: Usamos el nombre de columna correcto "dni" en minúscula
-        student_data = students_df[students_df["dni"].astype(str) == selected_dni].to_dict('records')
+        student_data = students_df[dni_mask(students_df["dni"], selected_dni)].to_dict('records')
         
         if student_data:
             student_data = student_data[0]
@@ -479,11 +545,13 @@ def student_login_optimized():
             # Verificación del teléfono
             student_phone = str(student_data.get('telefono', ''))
             
-            # NUEVA LÓGICA: Generar device_id basado en teléfono
-            if student_phone:
-                device_id = get_device_id_from_phone(student_phone)
-            else:
-                device_id = generate_session_device_id()            
+            # ID de dispositivo: token del navegador + teléfono, calculado una vez por sesión
+            device_id = get_device_fingerprint(student_phone)
+            if device_id is None:
+                # Sin el token del navegador no se puede validar el dispositivo: el componente
+                # vuelve a ejecutar la página al responder
+                st.info("Identificando el dispositivo... Si este mensaje no desaparece, habilite JavaScript y las cookies del navegador.")
+                st.stop()
             
             # Actualizar session_state
             st.session_state.device_id = device_id
@@ -500,12 +568,11 @@ def student_login_optimized():
                     
                     # CORRECCIÓN: Usamos "materia" en minúscula
                     # student_subjects = students_df[students_df["dni"].astype(str) == selected_dni]["materia"].unique().tolist()
-                    student_subjects = get_student_subjects_cached(selected_dni, students_df)
+                    student_subjects = get_student_subjects(selected_dni)
                     if student_subjects:
                         selected_subject = st.selectbox("Seleccione materia:", student_subjects)
                         # CORRECCIÓN: Usamos "comision" en minúscula
-                        commission = students_df[(students_df["dni"].astype(str) == selected_dni) & 
-                                            (students_df["materia"] == selected_subject)]["comision"].iloc[0]
+                        commission = get_student_commission(selected_dni, selected_subject)
                         
                         verification_method = st.radio(
                             "Método de verificación:",
@@ -514,12 +581,9 @@ def student_login_optimized():
                         
                         if verification_method == "Escanear código QR":
                             st.info("Escanee el código QR mostrado por el profesor")
-                            uploaded_file = st.camera_input("Escanear código QR")
+                            extracted_code, scan_attempted = scan_classroom_qr("verification")
                             
-                            if uploaded_file is not None:
-                                # Procesar el código QR
-                                extracted_code = process_qr_code(uploaded_file)
-                                
+                            if scan_attempted:
                                 if extracted_code:
                                     # Mostrar el código extraído para que el usuario confirme
                                     st.success(f"Código QR detectado: {extracted_code}")
@@ -532,11 +596,11 @@ def student_login_optimized():
                                     
                                     if st.button("Verificar código", key="verify_qr_code"):
                                         # CORRECCIÓN: Usar SUBJECT y COMMISSION para verificar código
-                                        if verify_classroom_code(code, selected_subject, commission):
+                                        if verify_attendance_code(code, selected_subject, commission):
                                             # Register attendance with proper arguments
                                             device_info = {
                                                 "hostname": socket.gethostname(),
-                                                "ip": get_local_ip(),
+                                                "ip": get_client_ip(),
                                                 "device_id": device_id
                                             }
                                             
@@ -556,10 +620,10 @@ def student_login_optimized():
                                     code = st.text_input("Código:", max_chars=6, key="manual_qr_code_input")
                                     
                                     if st.button("Verificar código", key="verify_manual_qr_code"):
-                                        if verify_classroom_code(code, selected_subject, commission):
+                                        if verify_attendance_code(code, selected_subject, commission):
                                             device_info = {
                                                 "hostname": socket.gethostname(),
-                                                "ip": get_local_ip(),
+                                                "ip": get_client_ip(),
                                                 "device_id": device_id
                                             }
                                             
@@ -579,10 +643,10 @@ def student_login_optimized():
                             code = st.text_input("Código:", max_chars=6, key="manual_code_input_verification")
                             
                             if st.button("Verificar código", key="verify_manual_code_verification"):
-                                if verify_classroom_code(code, selected_subject, commission):
+                                if verify_attendance_code(code, selected_subject, commission):
                                     device_info = {
                                         "hostname": socket.gethostname(),
-                                        "ip": get_local_ip(),
+                                        "ip": get_client_ip(),
                                         "device_id": device_id
                                     }
                                     
@@ -606,31 +670,23 @@ def student_login_optimized():
             # Continue with attendance process after verification
             
             # Get available subjects for this student
-            student_subjects = students_df[students_df["dni"].astype(str) == selected_dni]["materia"].unique().tolist()
+            student_subjects = get_student_subjects(selected_dni)
             
             # Check which subjects are available at current time
-            schedule_df = st.session_state.schedule_df
             available_subjects = []
 
+            # Solo los horarios de las clases del estudiante, con fechas y horas ya
+            # parseadas una vez por instantánea del horario
             for subject in student_subjects:
                 # CORRECCIÓN: Usar "comision" en minúscula
-                student_commission = students_df[(students_df["dni"].astype(str) == selected_dni) & 
-                                                (students_df["materia"] == subject)]["comision"].iloc[0]
-                
-                # CORRECCIÓN: Usar los nombres de columnas como están en la base de datos
-                subject_schedule = schedule_df[(schedule_df["MATERIA"] == subject) & 
-                                            (schedule_df["COMISION"] == student_commission)]
+                student_commission = get_student_commission(selected_dni, subject)
                 
-                if not subject_schedule.empty:
-                    for _, row in subject_schedule.iterrows():
-                        if validate_time_for_subject(current_date, current_time, row["FECHA"], row["INICIO"], row["FINAL"]):
-                            available_subjects.append(subject)
-                            break  # Si encontramos al menos un horario válido, añadimos la materia
+                if is_class_open(get_class_times(subject, student_commission), argentina_now):
+                    available_subjects.append(subject)
 
             if available_subjects:
                 selected_subject = st.selectbox("Materia disponible:", available_subjects)
-                commission = students_df[(students_df["dni"].astype(str) == selected_dni) & 
-                                    (students_df["materia"] == selected_subject)]["comision"].iloc[0]
+                commission = get_student_commission(selected_dni, selected_subject)
                 
                 # Check if attendance already registered
                 # CORRECCIÓN: Pasamos directamente DNI, asunto y fecha a la función is_attendance_registered
@@ -652,12 +708,9 @@ def student_login_optimized():
                         
                         if verification_method == "Escanear código QR":
                             st.info("Escanee el código QR mostrado por el profesor")
-                            uploaded_file = st.camera_input("Tomar foto del código QR")
+                            extracted_code, scan_attempted = scan_classroom_qr("registration")
                             
-                            if uploaded_file is not None:
-                                # CORRECCIÓN: Procesar el código QR correctamente
-                                extracted_code = process_qr_code(uploaded_file)
-                                
+                            if scan_attempted:
                                 if extracted_code:
                                     st.success(f"Código QR detectado: {extracted_code}")
                                     code = extracted_code
@@ -666,10 +719,10 @@ def student_login_optimized():
                                     code = st.text_input("Código:", max_chars=6, key="qr_code_input")
                                 
                                 if st.button("Verificar código", key="verify_qr_code"):
-                                    if verify_classroom_code(code, selected_subject, commission):
+                                    if verify_attendance_code(code, selected_subject, commission):
                                         device_info = {
                                             "hostname": socket.gethostname(),
-                                            "ip": get_local_ip(),
+                                            "ip": get_client_ip(),
                                             "device_id": device_id
                                         }
                                         
@@ -690,10 +743,10 @@ def student_login_optimized():
                             code = st.text_input("Código:", max_chars=6, key="manual_code_input")
                             
                             if st.button("Verificar código", key="verify_manual_code"):
-                                if verify_classroom_code(code, selected_subject, commission):
+                                if verify_attendance_code(code, selected_subject, commission):
                                     device_info = {
                                         "hostname": socket.gethostname(),
-                                        "ip": get_local_ip(),
+                                        "ip": get_client_ip(),
                                         "device_id": device_id
                                     }
                                     
@@ -716,7 +769,7 @@ def student_login_optimized():
 # ADMIN LOGIN CORREGIDO
 def admin_login():
     st.subheader("Acceso Administrador")
-    admin_config = load_admin_config()
+    admin_config = get_admin_config()
     username = st.text_input("Usuario", key="admin_username")
     password = st.text_input("Contraseña", type="password", key="admin_password")
     
@@ -743,106 +796,87 @@ def check_attendance_exists(dni, subject, date):
     """Cache para verificar asistencia existente"""
     return is_attendance_registered(dni, subject, date)
 
+# Navegador de asistencia: filtros en la base de datos y una página por consulta
+@st.cache_data(ttl=60, show_spinner="Cargando asistencia...")
+def get_attendance_page_cached(before_id, filters):
+    """Cache de páginas de asistencia por cursor y filtros"""
+    return get_attendance_page(before_id=before_id, limit=ATTENDANCE_PAGE_SIZE + 1, **dict(filters))
+
+def attendance_browser():
+    # Opciones de filtro a partir del horario compartido (sin leer la tabla de asistencia)
+    catalog = get_schedule_catalog()
+    
+    # Filtros
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        date_range = st.date_input("Fechas:", value=(), format="DD/MM/YYYY", key="attendance_date_range")
+    with col2:
+        materia = st.selectbox("Materia:", ["Todas"] + catalog["materias"], key="attendance_materia")
+    with col3:
+        comision = st.selectbox("Comisión:", ["Todas"] + catalog["comisiones"], key="attendance_comision")
+    with col4:
+        dni = st.text_input("DNI:", key="attendance_dni").strip()
+    
+    filters = {
+        "date_from": date_range[0].strftime('%Y-%m-%d') if len(date_range) > 0 else None,
+        "date_to": date_range[-1].strftime('%Y-%m-%d') if len(date_range) > 0 else None,
+        "subject": materia if materia != "Todas" else None,
+        "commission": comision if comision != "Todas" else None,
+        "dni": dni or None
+    }
+    filters = tuple((key, value) for key, value in filters.items() if value is not None)
+    
+    # Volver a la primera página si cambiaron los filtros
+    if st.session_state.get('attendance_filters') != filters:
+        st.session_state.attendance_filters = filters
+        st.session_state.attendance_cursors = [None]
+    
+    cursors = st.session_state.attendance_cursors
+    page_df = get_attendance_page_cached(cursors[-1], filters)
+    
+    # Se pide un registro de más para saber si hay página siguiente
+    has_next = len(page_df) > ATTENDANCE_PAGE_SIZE
+    page_df = page_df.iloc[:ATTENDANCE_PAGE_SIZE]
+    
+    if page_df.empty:
+        st.warning("No hay registros de asistencia para los filtros seleccionados.")
+        return
+    
+    st.write(f"Página {len(cursors)} - mostrando {len(page_df)} registros de asistencia")
+    st.dataframe(page_df, use_container_width=True)
+    
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        if st.button("← Anterior", disabled=len(cursors) == 1, key="attendance_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Siguiente →", disabled=not has_next, key="attendance_next"):
+            cursors.append(int(page_df["id"].min()))
+            st.rerun()
+    with col3:
+        st.download_button(
+            label="⬇️ Descargar página (CSV)",
+            data=page_df.to_csv(index=False),
+            file_name=f"asistencia_pagina_{len(cursors)}.csv",
+            mime="text/csv"
+        )
+
 # 8. LAZY LOADING PARA ADMIN
 # REEMPLAZAR admin_dashboard_optimized() con:
 def admin_dashboard_optimized():
     st.title("Panel Administrativo")
-    tab1, tab2, tab3, tab4 = st.tabs(["Asistencia", "Códigos", "Horarios", "Config"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Asistencia", "Códigos", "Horarios", "Config", "Regularidad"])
     
     with tab1:
-        # LAZY LOADING REAL - Solo cargar cuando se necesite
-        if st.button("Cargar Datos de Asistencia") or st.session_state.get('attendance_loaded', False):
-            if not st.session_state.get('attendance_loaded', False):
-                with st.spinner("Cargando asistencia..."):
-                    st.session_state.attendance_data = load_attendance_cached()
-                    st.session_state.attendance_loaded = True
-            
-            attendance_df = st.session_state.attendance_data
-            
-            if attendance_df.empty:
-                st.warning("No hay registros de asistencia disponibles.")
-            else:
-                # Pagination para datasets grandes
-                items_per_page = 50
-                total_items = len(attendance_df)
-                
-                if total_items > items_per_page:
-                    page = st.number_input("Página", min_value=1, 
-                                         max_value=(total_items // items_per_page) + 1, 
-                                         value=1)
-                    start_idx = (page - 1) * items_per_page
-                    end_idx = start_idx + items_per_page
-                    paginated_df = attendance_df.iloc[start_idx:end_idx]
-                    st.info(f"Mostrando registros {start_idx + 1}-{min(end_idx, total_items)} de {total_items}")
-                else:
-                    paginated_df = attendance_df
-                
-                # Filtros optimizados
-                col1, col2 = st.columns(2)
-                with col1:
-                    if 'FECHA' in attendance_df.columns:
-                        fechas = ["Todas"] + sorted(attendance_df["FECHA"].unique().tolist(), reverse=True)
-                        fecha_seleccionada = st.selectbox("Fecha:", fechas)
-                
-                with col2:
-                    if 'MATERIA' in attendance_df.columns:
-                        materias = ["Todas"] + sorted(attendance_df["MATERIA"].unique().tolist())
-                        materia_seleccionada = st.selectbox("Materia:", materias)
-                
-                # Aplicar filtros solo si cambiaron
-                filter_key = f"{fecha_seleccionada}_{materia_seleccionada}"
-                if st.session_state.get('last_filter') != filter_key:
-                    filtered_df = paginated_df.copy()
-                    
-                    if fecha_seleccionada != "Todas":
-                        filtered_df = filtered_df[filtered_df["FECHA"] == fecha_seleccionada]
-                    if materia_seleccionada != "Todas":
-                        filtered_df = filtered_df[filtered_df["MATERIA"] == materia_seleccionada]
-                    
-                    st.session_state.filtered_attendance = filtered_df
-                    st.session_state.last_filter = filter_key
-                else:
-                    filtered_df = st.session_state.get('filtered_attendance', paginated_df)
-                
-                # Mostrar dataframe
-                st.write(f"Mostrando {len(filtered_df)} registros de asistencia")
-                st.dataframe(filtered_df, use_container_width=True)
-                
-                # ==================== AGREGAR AQUÍ LA EXPORTACIÓN ====================
-                # Exportar datos
-                if len(filtered_df) > 0:  # Solo mostrar si hay datos para exportar
-                    st.write("---")  # Separador visual
-                    
-                    col1, col2 = st.columns([1, 1])
-                    
-                    with col1:
-                        if st.button("Exportar a CSV", type="secondary"):
-                            export_filename = f"asistencia_{fecha_seleccionada}_{materia_seleccionada}.csv"
-                            export_filename = export_filename.replace("Todas", "completo").replace(" ", "_")
-                            
-                            # Crear archivo CSV para descargar
-                            csv = filtered_df.to_csv(index=False)
-                            st.success(f"CSV preparado: {len(filtered_df)} registros")
-                    
-                    with col2:
-                        if 'csv' in locals():  # Si se generó el CSV
-                            st.download_button(
-                                label="⬇️ Descargar CSV",
-                                data=csv,
-                                file_name=export_filename,
-                                mime="text/csv",
-                                type="primary"
-                            )
-                # ==================== FIN DE LA EXPORTACIÓN ====================
-                
-        else:
-            st.info("Haga clic en 'Cargar Datos de Asistencia' para ver los registros")
+        # Páginas filtradas en la base: no descarga la tabla de asistencia
+        attendance_browser()
         
     with tab2:
         st.subheader("Generador de Códigos de Clase")
        
         # Load subjects and commissions
-        schedule_df = st.session_state.schedule_df
+        schedule_df = get_schedule()
         subjects = schedule_df["MATERIA"].unique().tolist()
         
         selected_subject = st.selectbox("Seleccione materia:", subjects)
@@ -851,39 +885,104 @@ def admin_dashboard_optimized():
         commissions = schedule_df[schedule_df["MATERIA"] == selected_subject]["COMISION"].unique().tolist()
         selected_commission = st.selectbox("Seleccione comisión:", commissions)
         
-        # Select code validity time
-        validity_minutes = st.slider("Validez del código (minutos):", 5, 120, 30)
+        # Modo rotativo: el código se deriva de un secreto y la hora, sin escribir en la base de datos
+        rotating_mode = False
+        if is_rotating_mode_enabled():
+            rotating_mode = st.toggle("Código rotativo (cambia cada minuto, sin base de datos)", value=True)
         
-        if st.button("Generar Código QR"):
-            code = generate_classroom_code()
+        if rotating_mode:
+            rotating_qr_display(selected_subject, selected_commission)
+        else:
+            # Select code validity time
+            validity_minutes = st.slider("Validez del código (minutos):", 5, 120, 30)
+        
+            if st.button("Generar Código QR"):
+                code = generate_classroom_code()
             
-            # Calculate expiry time
-            now = datetime.datetime.now()
-            expiry_time = (now + datetime.timedelta(minutes=validity_minutes)).strftime('%Y-%m-%d %H:%M:%S')
+                # Calculate expiry time
+                now = datetime.datetime.now()
+                expiry_time = (now + datetime.timedelta(minutes=validity_minutes)).strftime('%Y-%m-%d %H:%M:%S')
             
-            # Save code to database
-            save_classroom_code(code, selected_subject, selected_commission, expiry_time)
+                # Save code to database
+                save_classroom_code(code, selected_subject, selected_commission, expiry_time)
             
-            # Display QR and code
-            qr_data = f"{code}|{selected_subject}|{selected_commission}"
-            qr_img = create_qr_code(qr_data)
+                # Display QR and code
+                qr_data = f"{code}|{selected_subject}|{selected_commission}"
+                qr_img = create_qr_code(qr_data)
             
-            st.success(f"Código generado: {code}")
-            st.success(f"Válido hasta: {expiry_time}")
-            st.image(qr_img, caption="Código QR para escanear")
+                st.success(f"Código generado: {code}")
+                st.success(f"Válido hasta: {expiry_time}")
+                st.image(qr_img, caption="Código QR para escanear")
             
-            # Add download button for QR code
-            st.download_button(
-                label="Descargar QR",
-                data=qr_img,
-                file_name=f"qr_{selected_subject}_{selected_commission}_{code}.png",
-                mime="image/png"
-            )
+                # Add download button for QR code
+                st.download_button(
+                    label="Descargar QR",
+                    data=qr_img,
+                    file_name=f"qr_{selected_subject}_{selected_commission}_{code}.png",
+                    mime="image/png"
+                )
+        
+            # Generación en lote para todas las clases del día
+            st.write("---")
+            st.write("### Códigos para todas las clases de hoy")
+        
+            if st.button("Generar códigos de hoy"):
+                _, today, _ = get_argentina_datetime()
+                todays_classes = classes_on_date(schedule_df, today)
+            
+                if not todays_classes:
+                    st.session_state.qr_batch = None
+                    st.warning("No hay clases programadas para hoy.")
+                else:
+                    now = datetime.datetime.now()
+                    expiry_time = (now + datetime.timedelta(minutes=validity_minutes)).strftime('%Y-%m-%d %H:%M:%S')
+                
+                    batch = []
+                    for subject, commission in todays_classes:
+                        code = generate_classroom_code()
+                        save_classroom_code(code, subject, commission, expiry_time)
+                        batch.append({"MATERIA": subject, "COMISION": commission, "CODIGO": code})
+                
+                    pngs = render_qr_batch([f"{item['CODIGO']}|{item['MATERIA']}|{item['COMISION']}" for item in batch])
+                    st.session_state.qr_batch = {
+                        "codes": pd.DataFrame(batch),
+                        "expiry_time": expiry_time,
+                        "zip": build_qr_zip([
+                            (f"qr_{item['MATERIA']}_{item['COMISION']}_{item['CODIGO']}.png", png)
+                            for item, png in zip(batch, pngs)
+                        ]),
+                        "pdf": build_qr_sheet_pdf([
+                            (f"{item['MATERIA']} - {item['COMISION']}\nCódigo: {item['CODIGO']}", png)
+                            for item, png in zip(batch, pngs)
+                        ]),
+                    }
+        
+            qr_batch = st.session_state.get('qr_batch')
+            if qr_batch:
+                st.success(f"{len(qr_batch['codes'])} códigos generados, válidos hasta: {qr_batch['expiry_time']}")
+                st.dataframe(qr_batch["codes"], use_container_width=True)
+            
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.download_button(
+                        label="Descargar ZIP",
+                        data=qr_batch["zip"],
+                        file_name="codigos_qr_hoy.zip",
+                        mime="application/zip"
+                    )
+                with col2:
+                    st.download_button(
+                        label="Descargar hoja para imprimir (PDF)",
+                        data=qr_batch["pdf"],
+                        file_name="codigos_qr_hoy.pdf",
+                        mime="application/pdf"
+                    )
     with tab3:
         st.subheader("Gestión de Horarios y Alumnos")
         
         # Subtabs para gestionar horarios o alumnos
         horario_tab, alumno_tab = st.tabs(["Gestión de Horarios", "Gestión de Alumnos"])
+        load_view('admin_schedules')
         
         with horario_tab:
             gestionar_horarios()
@@ -892,8 +991,9 @@ def admin_dashboard_optimized():
             gestionar_alumnos() 
     with tab4:
         st.subheader("Configuración del Sistema")
+        load_view('configuration')
         
-        admin_config = load_admin_config()
+        admin_config = get_admin_config()
         
         # Configuración de acceso
         st.write("### Acceso Administrador")
@@ -911,6 +1011,7 @@ def admin_dashboard_optimized():
                 
                 # Guardar configuración en Supabase
                 update_admin_config(updated_config)
+                invalidate('admin_config')
                 st.success("Credenciales actualizadas correctamente")
             else:
                 st.error("Las contraseñas no coinciden")
@@ -921,23 +1022,128 @@ def admin_dashboard_optimized():
         current_ip_ranges = ", ".join(admin_config.get("allowed_ip_ranges", ["192.168.1.0/24"]))
         new_ip_ranges = st.text_input("Rangos IP permitidos (separados por coma)", value=current_ip_ranges)
         
-        if st.button("Actualizar Configuración de Red"):
-            # Validar formato de IPs
-            ip_list = [ip.strip() for ip in new_ip_ranges.split(",")]
+        # Validar formato de IPs, duplicados y rangos contenidos en otros
+        ip_list = [ip.strip() for ip in new_ip_ranges.split(",") if ip.strip()]
+        ip_issues = analyze_ip_ranges(ip_list)
+        for ip_range, problem in ip_issues:
+            st.warning(f"{ip_range}: {problem}")
+        invalid_ranges = [ip_range for ip_range in ip_list if parse_ip_range(ip_range) is None]
+        
+        if st.button("Actualizar Configuración de Red", disabled=bool(invalid_ranges)):
             updated_config = admin_config.copy()
             updated_config["allowed_ip_ranges"] = ip_list
             
             # Guardar configuración en Supabase
             update_admin_config(updated_config)
+            invalidate('admin_config')
             st.success("Configuración de red actualizada")
+        
+        # Proxies de confianza para leer la IP real del estudiante (X-Forwarded-For)
+        current_proxies = ", ".join(admin_config.get("trusted_proxies") or DEFAULT_TRUSTED_PROXIES)
+        new_proxies = st.text_input("Proxies de confianza (separados por coma)", value=current_proxies)
+        proxy_list = [proxy.strip() for proxy in new_proxies.split(",") if proxy.strip()]
+        invalid_proxies = [proxy for proxy in proxy_list if parse_ip_range(proxy) is None]
+        for proxy in invalid_proxies:
+            st.warning(f"{proxy}: formato CIDR inválido")
+        
+        if st.button("Actualizar Proxies", disabled=bool(invalid_proxies)):
+            updated_config = admin_config.copy()
+            updated_config["trusted_proxies"] = proxy_list
+            update_admin_config(updated_config)
+            invalidate('admin_config')
+            st.success("Proxies de confianza actualizados")
+        
+        # Memoria de las tablas cacheadas (representación compacta)
+        memory_report = get_memory_report()
+        if memory_report:
+            st.write("### Memoria de datos en caché")
+            for table, (before, after) in memory_report.items():
+                saved = 1 - after / before if before else 0
+                st.caption(f"{table}: {before / 1024:,.0f} KB → {after / 1024:,.0f} KB ({saved:.0%} menos)")
+
+        # Instantáneas compartidas por todas las sesiones
+        snapshots = snapshot_summary()
+        if snapshots:
+            st.write("### Instantáneas de datos")
+            st.dataframe(pd.DataFrame(snapshots), hide_index=True)
+            if st.button("Recargar datos"):
+                for snapshot in snapshots:
+                    invalidate(snapshot['tabla'])
+                st.rerun()
+
+        # Métricas del pool de decodificación de QR
+        st.write("### Decodificación de QR")
+        metrics = get_decode_pool_metrics()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("En cola", f"{metrics['queue_length']} / {metrics['max_pending']}")
+        col2.metric("Latencia p50", f"{metrics['latency_p50_ms'] or 0} ms")
+        col3.metric("Latencia p95", f"{metrics['latency_p95_ms'] or 0} ms")
+        col4.metric("Rechazadas", metrics['rejected'] + metrics['timeouts'])
+        st.caption(f"Workers: {metrics['workers']} - Procesadas: {metrics['completed']} - Errores: {metrics['errors']}")
+    
+    with tab5:
+        regularity_view()
+
+def regularity_view():
+    """Porcentaje de asistencia por estudiante y clase, resaltando a quienes están por debajo del umbral"""
+    st.subheader("Regularidad de Estudiantes")
+    
+    # Las pestañas se dibujan todas juntas: la asistencia completa se descarga solo a pedido
+    if not st.toggle("Calcular regularidad", key="show_regularity"):
+        st.caption("Requiere descargar el historial completo de asistencia.")
+        return
+    
+    load_view('admin_attendance')
+    matrix = get_attendance_matrix().reset_index()
+    if matrix.empty:
+        st.info("No hay estudiantes inscriptos")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        threshold = st.slider("Asistencia mínima (%)", 0, 100, REGULARITY_THRESHOLD, step=5)
+    with col2:
+        subjects = ["Todas"] + sorted(matrix['MATERIA'].unique().tolist())
+        subject = st.selectbox("Materia", subjects, key="regularity_subject")
+    
+    if subject != "Todas":
+        matrix = matrix[matrix['MATERIA'] == subject]
+    
+    below = matrix[matrix['PORCENTAJE'] < threshold]
+    col1, col2 = st.columns(2)
+    col1.metric("Inscripciones", len(matrix))
+    col2.metric("Debajo del umbral", len(below))
+    
+    pivot = percentage_pivot(matrix)
+    styled = pivot.style.map(
+        lambda value: 'background-color: #f8d7da' if pd.notna(value) and value < threshold else ''
+    ).format('{:.1f}', na_rep='-')
+    st.dataframe(styled, use_container_width=True)
+    
+    if not below.empty:
+        st.write("### Estudiantes debajo del umbral")
+        st.dataframe(
+            below.sort_values('PORCENTAJE')[
+                ['DNI', 'APELLIDO Y NOMBRE', 'MATERIA', 'COMISION', 'ASISTIDAS', 'PROGRAMADAS', 'PORCENTAJE']
+            ],
+            hide_index=True, use_container_width=True
+        )
+
+def show_schedule_conflicts(conflicts):
+    if conflicts:
+        st.error(f"El horario se superpone con {len(conflicts)} clase(s) de la misma comisión y fecha:")
+        st.dataframe(pd.DataFrame(conflicts), hide_index=True)
 
 # Función para gestionar horarios
 def gestionar_horarios():
     st.write("### Horarios de Materias")
     
+    supabase = get_supabase_client()
+    
     # Cargar datos actuales
     # schedule_df = load_schedule()
-    schedule_df = st.session_state.schedule_df
+    schedule_df = get_schedule()
+    schedule_index = get_schedule_index()
     
     # Mostrar horarios actuales
     if not schedule_df.empty:
@@ -981,6 +1187,7 @@ def gestionar_horarios():
                 
                 # Eliminar de Supabase
                 supabase.table('schedule').delete().eq('id', horario['id']).execute()
+                apply_schedule_change(removed_id=horario['id'])
                 
                 st.success(f"Horario eliminado: {horario_a_eliminar}")
                 st.rerun()
@@ -1003,15 +1210,23 @@ def gestionar_horarios():
             hora_inicio = st.text_input("Hora de inicio (HH:MM):", value=horario_actual["INICIO"])
             hora_fin = st.text_input("Hora de fin (HH:MM):", value=horario_actual["FINAL"])
             
-            if st.button("Guardar Cambios"):
-                # Actualizar en Supabase
-                supabase.table('schedule').update({
+            # Validar superposición antes de guardar
+            conflictos = find_schedule_conflicts(
+                schedule_index, fecha, comision, hora_inicio, hora_fin, ignore_id=horario_actual['id']
+            )
+            show_schedule_conflicts(conflictos)
+            
+            if st.button("Guardar Cambios", disabled=bool(conflictos)):
+                horario_modificado = {
                     "MATERIA": materia,
                     "COMISION": comision,
                     "FECHA": fecha,
                     "INICIO": hora_inicio,
                     "FINAL": hora_fin
-                }).eq('id', horario_actual['id']).execute()
+                }
+                # Actualizar en Supabase
+                supabase.table('schedule').update(horario_modificado).eq('id', horario_actual['id']).execute()
+                apply_schedule_change(dict(horario_modificado, id=horario_actual['id']))
                 
                 st.success("Horario actualizado correctamente")
                 st.rerun()
@@ -1044,7 +1259,16 @@ def gestionar_horarios():
     with col2:
         hora_fin_nueva = st.time_input("Hora de fin:", datetime.time(21, 0))
     
-    if st.button("Agregar Horario"):
+    # Validar superposición antes de guardar
+    conflictos = []
+    if comision_nueva:
+        conflictos = find_schedule_conflicts(
+            schedule_index, dia_seleccionado, comision_nueva,
+            hora_inicio_nueva.strftime("%H:%M"), hora_fin_nueva.strftime("%H:%M")
+        )
+        show_schedule_conflicts(conflictos)
+    
+    if st.button("Agregar Horario", disabled=bool(conflictos)):
         if materia_nueva and comision_nueva:
             # Guardar en Supabase
             nuevo_horario = {
@@ -1055,20 +1279,28 @@ def gestionar_horarios():
                 "FINAL": hora_fin_nueva.strftime("%H:%M")
             }
             
-            supabase.table('schedule').insert(nuevo_horario).execute()
+            response = supabase.table('schedule').insert(nuevo_horario).execute()
+            if response.data:
+                apply_schedule_change(response.data[0])
             
             st.success(f"Horario agregado correctamente para {materia_nueva} - {comision_nueva}")
             st.rerun()
         else:
             st.error("Debe completar todos los campos")
 
+def refresh_students():
+    """Tras modificar alumnos: todas las sesiones releen la tabla en su próxima carga"""
+    invalidate('students')
+
 # Función para gestionar alumnos
 def gestionar_alumnos():
     st.write("### Gestión de Alumnos")
     
+    supabase = get_supabase_client()
+    
     # Cargar datos de alumnos
     # students_df = load_students()
-    students_df = st.session_state.students_df
+    students_df = get_students()
     
     # Mostrar alumnos actuales
     if not students_df.empty:
@@ -1099,7 +1331,7 @@ def gestionar_alumnos():
         dni_busqueda = st.text_input("Ingrese DNI:")
         
         if dni_busqueda:
-            alumno = students_df[students_df["dni"] == dni_busqueda]
+            alumno = students_df[dni_mask(students_df["dni"], dni_busqueda)]
             
             if not alumno.empty:
                 st.success(f"Alumno encontrado: {alumno['apellido_nombre'].iloc[0]}")
@@ -1122,6 +1354,7 @@ def gestionar_alumnos():
                             "telefono": telefono,
                             "correo": correo
                         }).eq('id', alumno['id'].iloc[0]).execute()
+                        refresh_students()
                         
                         st.success("Datos actualizados correctamente")
                         st.rerun()
@@ -1130,13 +1363,14 @@ def gestionar_alumnos():
                     if st.button("Confirmar Eliminación", type="primary"):
                         # Eliminar de Supabase usando id
                         supabase.table('students').delete().eq('id', alumno['id'].iloc[0]).execute()
+                        refresh_students()
                         
                         st.success(f"Alumno {alumno['apellido_nombre'].iloc[0]} eliminado correctamente")
                         st.rerun()
                 
                 elif accion == "Modificar Materias":
                     # Mostrar materias actuales del alumno seleccionado
-                    materias_alumno = students_df[students_df["dni"] == dni_busqueda][["materia", "comision", "id"]]
+                    materias_alumno = students_df[dni_mask(students_df["dni"], dni_busqueda)][["materia", "comision", "id"]]
                     st.write("Materias actuales:")
                     st.dataframe(materias_alumno[["materia", "comision"]])  # No mostrar ID al usuario
                     
@@ -1146,7 +1380,7 @@ def gestionar_alumnos():
                     if opcion_materia == "Agregar Materia":
                         # Cargar lista de materias disponibles
                         # schedule_df = load_schedule()
-                        schedule_df = st.session_state.schedule_df
+                        schedule_df = get_schedule()
                         materias_disponibles = sorted(schedule_df["MATERIA"].unique().tolist()) if not schedule_df.empty else []
                         
                         if materias_disponibles:
@@ -1174,6 +1408,7 @@ def gestionar_alumnos():
                                         "comision": nueva_comision
                                     }
                                     supabase.table('students').insert(new_student_entry).execute()
+                                    refresh_students()
                                     
                                     st.success(f"Materia {nueva_materia} agregada correctamente")
                                     st.rerun()
@@ -1192,6 +1427,7 @@ def gestionar_alumnos():
                                 
                                 # Eliminar esta combinación específica usando el id
                                 supabase.table('students').delete().eq('id', registro_a_quitar['id']).execute()
+                                refresh_students()
                                 
                                 st.success(f"Materia {registro_a_quitar['materia']} quitada correctamente")
                                 st.rerun()
@@ -1214,7 +1450,7 @@ def gestionar_alumnos():
     
     if agregar_materia:
         #schedule_df = load_schedule()
-        schedule_df = st.session_state.schedule_df
+        schedule_df = get_schedule()
         materias_disponibles = sorted(schedule_df["MATERIA"].unique().tolist()) if not schedule_df.empty else []
         
         if materias_disponibles:
@@ -1234,7 +1470,7 @@ def gestionar_alumnos():
     if st.button("Registrar Alumno"):
         if nuevo_dni and nuevo_nombre and nueva_tecnicatura:
             # Verificar que no exista
-            if (students_df["dni"] == nuevo_dni).any():
+            if dni_mask(students_df["dni"], nuevo_dni).any():
                 st.error("Ya existe un alumno con ese DNI")
             else:
                 # Insertar en Supabase
@@ -1248,6 +1484,7 @@ def gestionar_alumnos():
                     "comision": comision_inicial
                 }
                 supabase.table('students').insert(new_student).execute()
+                refresh_students()
                 
                 st.success(f"Alumno {nuevo_nombre} registrado correctamente")
                 if materia_inicial == "Sin asignar":
@@ -1256,12 +1493,6 @@ def gestionar_alumnos():
         else:
             st.error("Debe completar DNI, Nombre y Tecnicatura")
         
-# 9. OPTIMIZAR VALIDACIONES
-@lru_cache(maxsize=128)
-def validate_time_cached(current_date, current_time, class_date, start_time, end_time):
-    """Cache validaciones de tiempo"""
-    return validate_time_for_subject(current_date, current_time, class_date, start_time, end_time)
-
 ########################  
 # Main app
 # 10. MAIN FUNCTION OPTIMIZADA
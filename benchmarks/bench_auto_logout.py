@@ -0,0 +1,89 @@
+"""
+Modelo de colas del cierre automático después de registrar asistencia
+
+Compara la cuenta regresiva anterior (time.sleep(1) x 15 dentro del script,
+que retiene el hilo del script 15 segundos) contra el fragmento con
+run_every=1, que solo ocupa un hilo unos milisegundos por segundo.
+
+Es un modelo, no una medición: no ejecuta Streamlit ni la app. Los números
+que imprime dependen por completo de estos supuestos (todos configurables):
+  - hay un número fijo de hilos de script (--threads) compartidos por todas
+    las sesiones; Streamlit crea un hilo por sesión, así que este límite
+    representa la capacidad real del servidor, que hay que medir aparte
+  - los estudiantes llegan uniformemente durante la ventana (--window)
+  - el rerun de registro dura --work segundos y cada tick del fragmento
+    --tick-cost segundos, valores supuestos y no medidos
+  - un tick del fragmento se atiende como un trabajo más de la misma cola
+Se busca la mayor cantidad de registros por ventana manteniendo la espera
+p95 por debajo del límite indicado.
+
+Uso:
+    python benchmarks/bench_auto_logout.py [--threads 16] [--window 120]
+"""
+import argparse
+import heapq
+
+
+def simulate(students, threads, window, work, countdown, tick_cost, blocking):
+    """Devuelve la espera p95 (segundos) de los registros para obtener un hilo"""
+    jobs = []
+    for i in range(students):
+        arrival = window * i / max(students, 1)
+        if blocking:
+            jobs.append((arrival, work + countdown, True))
+        else:
+            jobs.append((arrival, work, True))
+            for tick in range(1, countdown + 1):
+                jobs.append((arrival + work + tick, tick_cost, False))
+    jobs.sort()
+
+    free_at = [0.0] * threads
+    heapq.heapify(free_at)
+    waits = []
+    for arrival, duration, is_registration in jobs:
+        available = heapq.heappop(free_at)
+        start = max(arrival, available)
+        heapq.heappush(free_at, start + duration)
+        if is_registration:
+            waits.append(start - arrival)
+
+    waits.sort()
+    return waits[int(len(waits) * 0.95) - 1] if waits else 0.0
+
+
+def max_students(threads, window, work, countdown, tick_cost, blocking, max_wait):
+    """Búsqueda binaria de la mayor carga que cumple el límite de espera"""
+    low, high = 1, 100_000
+    while low < high:
+        mid = (low + high + 1) // 2
+        if simulate(mid, threads, window, work, countdown, tick_cost, blocking) <= max_wait:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16, help="Hilos de script disponibles")
+    parser.add_argument('--window', type=float, default=120, help="Ventana de llegada en segundos")
+    parser.add_argument('--work', type=float, default=0.4, help="Duración del rerun de registro (s)")
+    parser.add_argument('--countdown', type=int, default=15, help="Segundos de cuenta regresiva")
+    parser.add_argument('--tick-cost', type=float, default=0.005, help="Costo de cada tick del fragmento (s)")
+    parser.add_argument('--max-wait', type=float, default=1.0, help="Espera p95 máxima aceptable (s)")
+    args = parser.parse_args()
+
+    common = (args.threads, args.window, args.work, args.countdown, args.tick_cost)
+    blocking = max_students(*common, True, args.max_wait)
+    fragment = max_students(*common, False, args.max_wait)
+
+    print("Modelo de colas (no es una medición; ver los supuestos en el docstring)")
+    print(f"Hilos de script: {args.threads}, ventana: {args.window:.0f} s, espera p95 <= {args.max_wait} s")
+    print(f"Supuestos: rerun de registro {args.work} s, tick del fragmento {args.tick_cost} s")
+    print(f"time.sleep en el script:  {blocking:6d} registros por ventana")
+    print(f"Fragmento run_every=1:    {fragment:6d} registros por ventana")
+    print(f"Capacidad según el modelo: {fragment / blocking:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
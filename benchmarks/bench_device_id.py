@@ -0,0 +1,65 @@
+"""
+Costo por rerun del ID de dispositivo en la pantalla del estudiante
+
+Antes: cada rerun con un DNI seleccionado llamaba a get_device_id_from_phone,
+que ejecuta extract_mac_address (proceso externo `ip link show` en Linux).
+Ahora: el ID se calcula una vez por sesión con device_fingerprint (token del
+navegador + hash del teléfono) y los reruns siguientes solo leen session state.
+
+Uso:
+    python benchmarks/bench_device_id.py [--reruns 200]
+"""
+import argparse
+import secrets
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio padre al path para importar los módulos de la app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from network import get_device_id_from_phone, device_fingerprint
+
+PHONE = "+54 9 11 5555-1234"
+
+
+def rerun_before():
+    return get_device_id_from_phone(PHONE)
+
+
+def make_rerun_after():
+    # Equivalente a get_device_fingerprint de app.py con st.session_state como dict
+    session_state = {'device_token': secrets.token_hex(16)}
+
+    def rerun_after():
+        fingerprints = session_state.setdefault('device_fingerprints', {})
+        if PHONE not in fingerprints:
+            fingerprints[PHONE] = device_fingerprint(session_state['device_token'], PHONE)
+        return fingerprints[PHONE]
+
+    return rerun_after
+
+
+def measure(func, reruns):
+    start = time.perf_counter()
+    for _ in range(reruns):
+        func()
+    return (time.perf_counter() - start) / reruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reruns', type=int, default=200, help="Reruns simulados por sesión")
+    args = parser.parse_args()
+
+    before = measure(rerun_before, args.reruns)
+    after = measure(make_rerun_after(), args.reruns)
+
+    print(f"Reruns por sesión: {args.reruns}")
+    print(f"get_device_id_from_phone (proceso externo): {before * 1e6:10.1f} µs/rerun")
+    print(f"device_fingerprint memorizado:              {after * 1e6:10.1f} µs/rerun")
+    print(f"Mejora: {before / after:,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
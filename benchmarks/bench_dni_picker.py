@@ -0,0 +1,78 @@
+"""
+Medición del payload enviado al navegador por el selector de DNI
+
+Compara el selectbox con todos los DNIs (versión anterior) contra la entrada
+por prefijo, que solo envía las sugerencias. El tamaño se mide serializando
+los mensajes protobuf que Streamlit envía al cliente.
+
+Uso:
+    python benchmarks/bench_dni_picker.py [--students 5000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from streamlit.proto.Selectbox_pb2 import Selectbox
+from streamlit.proto.TextInput_pb2 import TextInput
+
+# Agregar el directorio padre al path para importar los módulos de la app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils import build_dni_index, search_dni_prefix
+
+SUGGESTIONS = 5
+
+
+def generate_students(count, seed=42):
+    rng = random.Random(seed)
+    dnis = rng.sample(range(20_000_000, 48_000_000), count)
+    return pd.DataFrame({'dni': [str(dni) for dni in dnis]})
+
+
+def selectbox_payload(options):
+    widget = Selectbox(label="Seleccione su DNI:", options=options)
+    return widget.ByteSize()
+
+
+def text_input_payload():
+    widget = TextInput(label="Ingrese su DNI:", max_chars=12)
+    return widget.ByteSize()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=5000)
+    args = parser.parse_args()
+
+    students_df = generate_students(args.students)
+
+    # Antes: selectbox con el padrón completo en cada rerun
+    dni_list = [""] + sorted(students_df["dni"].astype(str).unique().tolist())
+    before = selectbox_payload(dni_list)
+
+    # Después: text_input + selectbox con las sugerencias del prefijo
+    start = time.perf_counter()
+    dni_index = build_dni_index(students_df["dni"])
+    build_ms = (time.perf_counter() - start) * 1000
+
+    sample = students_df["dni"].iloc[0]
+    start = time.perf_counter()
+    for _ in range(1000):
+        matches = search_dni_prefix(dni_index, sample[:4], limit=SUGGESTIONS)
+    search_us = (time.perf_counter() - start) * 1000
+
+    after = text_input_payload() + selectbox_payload([""] + matches)
+
+    print(f"Estudiantes: {args.students}")
+    print(f"Payload antes:   {before:10,d} bytes por rerun")
+    print(f"Payload después: {after:10,d} bytes por rerun")
+    print(f"Reducción:       {before / after:10.1f}x")
+    print(f"Construcción del índice: {build_ms:.2f} ms (cacheado)")
+    print(f"Búsqueda por prefijo:    {search_us:.2f} µs por consulta")
+
+
+if __name__ == '__main__':
+    main()
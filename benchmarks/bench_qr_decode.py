@@ -0,0 +1,170 @@
+"""
+Benchmark del decodificador de QR por etapas (qr_codes.decode_qr_image)
+
+Genera un corpus sintético de fotos de cámara (perspectiva, desenfoque,
+ruido, gradiente de iluminación, compresión JPEG) y opcionalmente agrega
+capturas reales de un directorio. Para las capturas reales, si existe un
+archivo <imagen>.txt con el contenido esperado se verifica el resultado.
+
+Reporta tasa de decodificación, latencia total y, por etapa, cuántas
+imágenes resolvió y cuánto tardó.
+
+Uso:
+    python benchmarks/bench_qr_decode.py [--synthetic 60] [--corpus DIR] [--save-corpus DIR]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import cv2
+import numpy as np
+import qrcode
+
+# Agregar el directorio padre al path para importar los módulos de la app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from qr_codes import decode_qr_image, get_zbar_decode
+
+zbar_decode = get_zbar_decode()
+
+RESOLUTIONS = [(1280, 720), (1920, 1080), (3024, 4032)]
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp'}
+
+
+def render_qr(payload, box_size):
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=box_size, border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white").convert('L')
+    return np.array(img)
+
+
+def synthetic_capture(rng, payload):
+    """Simula la foto de un QR proyectado o impreso tomada con un celular"""
+    width, height = rng.choice(RESOLUTIONS)
+    canvas = np.full((height, width), rng.randint(90, 200), np.uint8)
+    canvas = cv2.add(canvas, np.random.default_rng(rng.randint(0, 2**31)).integers(
+        0, 40, canvas.shape, dtype=np.uint8))
+
+    qr_side = int(min(width, height) * rng.uniform(0.2, 0.6))
+    qr_img = render_qr(payload, box_size=10)
+    qr_img = cv2.resize(qr_img, (qr_side, qr_side), interpolation=cv2.INTER_NEAREST)
+
+    # Perspectiva: esquinas del QR desplazadas aleatoriamente
+    x0 = rng.randint(0, width - qr_side)
+    y0 = rng.randint(0, height - qr_side)
+    jitter = qr_side * 0.12
+    src = np.float32([[0, 0], [qr_side, 0], [qr_side, qr_side], [0, qr_side]])
+    dst = np.float32([[x0 + rng.uniform(-jitter, jitter), y0 + rng.uniform(-jitter, jitter)],
+                      [x0 + qr_side + rng.uniform(-jitter, jitter), y0 + rng.uniform(-jitter, jitter)],
+                      [x0 + qr_side + rng.uniform(-jitter, jitter), y0 + qr_side + rng.uniform(-jitter, jitter)],
+                      [x0 + rng.uniform(-jitter, jitter), y0 + qr_side + rng.uniform(-jitter, jitter)]])
+    matrix = cv2.getPerspectiveTransform(src, dst)
+    mask = cv2.warpPerspective(np.full_like(qr_img, 255), matrix, (width, height))
+    warped = cv2.warpPerspective(qr_img, matrix, (width, height))
+    canvas = np.where(mask > 0, warped, canvas)
+
+    # Contraste reducido, gradiente de iluminación, desenfoque y compresión
+    contrast = rng.uniform(0.5, 1.0)
+    gradient = np.linspace(rng.uniform(-60, 0), rng.uniform(0, 60), width, dtype=np.float32)
+    img = canvas.astype(np.float32) * contrast + (1 - contrast) * 128 + gradient[None, :]
+    img = np.clip(img, 0, 255).astype(np.uint8)
+    blur = rng.choice([1, 3, 5, 7])
+    img = cv2.GaussianBlur(img, (blur, blur), 0)
+
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, rng.randint(60, 92)])
+    return encoded.tobytes()
+
+
+def load_corpus(directory):
+    items = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() in IMAGE_EXTENSIONS:
+            expected_path = path.with_suffix(path.suffix + '.txt')
+            expected = expected_path.read_text().strip() if expected_path.exists() else None
+            items.append((path.name, path.read_bytes(), expected))
+    return items
+
+
+def legacy_decode(image_bytes):
+    """Pipeline anterior: PIL + cv2.imdecode a resolución completa y un solo umbral"""
+    from PIL import Image
+    import io
+    image = Image.open(io.BytesIO(image_bytes))
+    img_cv = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    decoded = zbar_decode(image)
+    if not decoded:
+        img_cv = cv2.adaptiveThreshold(img_cv, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        decoded = zbar_decode(Image.fromarray(img_cv))
+    return decoded[0].data.decode('utf-8') if decoded else None
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--synthetic', type=int, default=60, help="Cantidad de capturas sintéticas")
+    parser.add_argument('--corpus', help="Directorio con capturas reales")
+    parser.add_argument('--save-corpus', help="Guardar las capturas sintéticas en este directorio")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = []
+    for i in range(args.synthetic):
+        payload = f"{''.join(rng.choices('ABCDEFGHJKLMNPQRSTUVWXYZ23456789', k=6))}|Materia {i % 7}|{rng.choice('ABC')}"
+        corpus.append((f"synthetic_{i:03d}.jpg", synthetic_capture(rng, payload), payload))
+    if args.save_corpus:
+        out = Path(args.save_corpus)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, data, expected in corpus:
+            (out / name).write_bytes(data)
+            (out / (name + '.txt')).write_text(expected)
+    if args.corpus:
+        corpus += load_corpus(args.corpus)
+
+    decoded, wrong, totals = 0, 0, []
+    solved_by = defaultdict(int)
+    stage_times = defaultdict(list)
+    for name, data, expected in corpus:
+        start = time.perf_counter()
+        qr_data, stage, timings = decode_qr_image(data)
+        totals.append((time.perf_counter() - start) * 1000)
+        for stage_name, elapsed in timings.items():
+            stage_times[stage_name].append(elapsed)
+        if qr_data:
+            solved_by[stage] += 1
+            if expected is not None and qr_data != expected:
+                wrong += 1
+            else:
+                decoded += 1
+
+    print(f"Imágenes: {len(corpus)}  (pyzbar {'disponible' if zbar_decode else 'NO disponible'})")
+    print(f"Decodificadas: {decoded} ({decoded / max(len(corpus), 1):.0%}), incorrectas: {wrong}")
+    print(f"Latencia total: p50 {percentile(totals, 50):.1f} ms, p95 {percentile(totals, 95):.1f} ms")
+    print(f"{'Etapa':<28}{'Ejecuciones':>12}{'Resueltas':>10}{'Media ms':>10}{'p95 ms':>10}")
+    for stage_name, values in stage_times.items():
+        print(f"{stage_name:<28}{len(values):>12}{solved_by.get(stage_name, 0):>10}"
+              f"{statistics.mean(values):>10.1f}{percentile(values, 95):>10.1f}")
+
+    if zbar_decode is not None:
+        legacy_totals, legacy_decoded = [], 0
+        for name, data, expected in corpus:
+            start = time.perf_counter()
+            legacy_decoded += legacy_decode(data) is not None
+            legacy_totals.append((time.perf_counter() - start) * 1000)
+        print(f"Pipeline anterior: {legacy_decoded} decodificadas, "
+              f"p50 {percentile(legacy_totals, 50):.1f} ms, p95 {percentile(legacy_totals, 95):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark de arranque: tiempo de importación de los módulos de la app
+
+Importa en un proceso nuevo los módulos que cargan app.py y pages/1_Admin.py
+con `python -X importtime` y reporta:
+  - tiempo total de importación (mediana de varias corridas)
+  - los módulos de mayor tiempo acumulado
+  - qué dependencias pesadas (cv2, qrcode, PIL, pyzbar, openpyxl, supabase)
+    quedaron cargadas al arrancar
+
+Con --eager se importan además las dependencias pesadas, para comparar contra
+el arranque anterior en el que se cargaban siempre.
+
+Uso:
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--eager]
+"""
+import argparse
+import importlib.util
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Módulos propios que importan app.py y la página de administración
+APP_MODULES = [
+    "utils", "network", "qr_codes", "qr_scanner", "device_token", "rotating_codes",
+    "database", "analytics", "schedule_index", "exports", "export_jobs",
+]
+HEAVY_MODULES = ["cv2", "qrcode", "PIL", "pyzbar", "openpyxl", "supabase"]
+
+
+def import_script(eager):
+    modules = list(APP_MODULES)
+    if eager:
+        modules += [name for name in HEAVY_MODULES if importlib.util.find_spec(name) is not None]
+    loaded_check = f"print('LOADED', [m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    return f"import sys; sys.path.insert(0, {str(ROOT)!r}); import {', '.join(modules)}; {loaded_check}"
+
+
+def run_once(eager):
+    """Devuelve (filas de importtime, dependencias pesadas cargadas)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", import_script(eager)],
+        capture_output=True, text=True, cwd=ROOT, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # La sangría del nombre (después del primer espacio) indica el nivel de anidamiento
+        rows.append((name.rstrip()[1:], int(self_us), int(cumulative_us)))
+    loaded = next((line for line in result.stdout.splitlines() if line.startswith("LOADED")), "LOADED []")
+    return rows, loaded[len("LOADED "):]
+
+
+def total_ms(rows):
+    # Los módulos de primer nivel (sin sangría) suman el tiempo total
+    return sum(cumulative for name, _, cumulative in rows if not name.startswith(" ")) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Procesos a medir")
+    parser.add_argument('--top', type=int, default=15, help="Módulos a listar")
+    parser.add_argument('--eager', action='store_true', help="Importar también las dependencias pesadas")
+    args = parser.parse_args()
+
+    runs = [run_once(args.eager) for _ in range(args.runs)]
+    totals = [total_ms(rows) for rows, _ in runs]
+    rows, loaded = runs[-1]
+
+    print(f"Importación de la app ({'con' if args.eager else 'sin'} dependencias pesadas): "
+          f"mediana {statistics.median(totals):.0f} ms, min {min(totals):.0f} ms en {args.runs} corridas")
+    print(f"Dependencias pesadas cargadas al arrancar: {loaded}")
+    print("\nMódulos con mayor tiempo acumulado (última corrida):")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  (propio {self_us / 1000:7.1f} ms)  {name.strip()}")
+
+
+if __name__ == '__main__':
+    main()
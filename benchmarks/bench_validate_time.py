@@ -0,0 +1,119 @@
+"""
+Benchmark de validación de horarios habilitados
+
+Compara tres formas de decidir qué clases están habilitadas ahora:
+  - escalar: validate_time_for_subject en un bucle simple sobre las columnas
+  - vectorizado: validate_time_for_subject_batch sobre todo el horario
+  - índice: build_class_times una vez por horario (como el índice de la instantánea)
+    y luego is_class_open solo para las clases de un estudiante
+
+El escalar se recorre con zip sobre las columnas y no con iterrows, para no medir
+el costo de armar una Series por fila.
+
+Uso:
+    python benchmarks/bench_validate_time.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import datetime
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Agregar el directorio padre al path para importar los módulos de la app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils import validate_time_for_subject, validate_time_for_subject_batch, build_class_times, is_class_open
+
+# Clases por estudiante en la consulta del índice
+STUDENT_CLASSES = 5
+
+
+def generate_schedule(rows, today, seed=42):
+    """Genera un horario sintético con fechas DD/MM/YYYY e ISO mezcladas"""
+    rng = random.Random(seed)
+    data = []
+    for _ in range(rows):
+        day = today + datetime.timedelta(days=rng.randint(-3, 3))
+        if rng.random() < 0.5:
+            fecha = day.strftime('%d/%m/%Y')
+        else:
+            fecha = day.strftime('%Y-%m-%d')
+        start_hour = rng.randint(7, 21)
+        start_min = rng.choice([0, 15, 30, 45])
+        duration = rng.choice([60, 90, 120, 180])
+        end = datetime.datetime.combine(day, datetime.time(start_hour, start_min)) + datetime.timedelta(minutes=duration)
+        fmt = '%H:%M:%S' if rng.random() < 0.5 else '%H:%M'
+        data.append({
+            'MATERIA': f"Materia {rng.randrange(50)}",
+            'COMISION': f"Comisión {rng.choice('ABCDEFGH')}",
+            'FECHA': fecha,
+            'INICIO': datetime.time(start_hour, start_min).strftime(fmt),
+            'FINAL': end.time().strftime(fmt),
+        })
+    return pd.DataFrame(data)
+
+
+def run_scalar(schedule_df, now):
+    current_date, current_time = now.date(), now.time()
+    return [
+        validate_time_for_subject(current_date, current_time, fecha, inicio, final)
+        for fecha, inicio, final in zip(schedule_df['FECHA'], schedule_df['INICIO'], schedule_df['FINAL'])
+    ]
+
+
+def run_batch(schedule_df, now):
+    return validate_time_for_subject_batch(schedule_df['FECHA'], schedule_df['INICIO'], schedule_df['FINAL'], now)
+
+
+def run_index_lookup(class_times, student_classes, now):
+    return [is_class_open(class_times.get(key, []), now) for key in student_classes]
+
+
+def best_of(func, repeat, *args):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    now = datetime.datetime(2025, 6, 18, 19, 20)
+    schedule_df = generate_schedule(args.rows, now.date())
+
+    scalar_time, scalar_result = best_of(run_scalar, args.repeat, schedule_df, now)
+    batch_time, batch_result = best_of(run_batch, args.repeat, schedule_df, now)
+    build_time, class_times = best_of(build_class_times, args.repeat, schedule_df)
+
+    if list(batch_result) != scalar_result:
+        print("ERROR: los resultados de la versión vectorizada no coinciden con la escalar")
+        sys.exit(1)
+
+    # Una clase está habilitada si alguna de sus filas lo está
+    open_classes = set(zip(schedule_df['MATERIA'][batch_result], schedule_df['COMISION'][batch_result]))
+    if any(is_class_open(times, now) != (key in open_classes) for key, times in class_times.items()):
+        print("ERROR: los resultados del índice no coinciden con la versión escalar")
+        sys.exit(1)
+
+    student_classes = list(class_times)[:STUDENT_CLASSES]
+    lookup_time, _ = best_of(run_index_lookup, args.repeat, class_times, student_classes, now)
+
+    print(f"Filas: {args.rows} (habilitadas: {int(batch_result.sum())})")
+    print(f"Escalar (bucle):               {scalar_time * 1000:9.3f} ms")
+    print(f"Vectorizado:                   {batch_time * 1000:9.3f} ms  ({scalar_time / batch_time:.2f}x del escalar)")
+    print(f"Índice, construcción (1 vez):  {build_time * 1000:9.3f} ms")
+    print(f"Índice, {len(student_classes)} clases del estudiante: {lookup_time * 1000:9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
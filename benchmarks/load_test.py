@@ -0,0 +1,362 @@
+"""
+Prueba de carga del registro de asistencia contra un backend local en memoria
+
+Simula el pico de inicio de clase: N estudiantes virtuales llegan según una
+curva de llegada y cada uno recorre el camino de registro de la app:
+
+    verify_classroom_code -> is_attendance_registered ->
+    validate_device_for_subject -> register_attendance_transaction
+
+La base de datos se reemplaza por un cliente en memoria con la misma interfaz
+de consultas que usa database.py (table/select/eq/.../execute), restricciones
+únicas como las de Supabase (error 23505) y una latencia de red configurable.
+Los hilos de trabajo representan los hilos de script de Streamlit.
+
+Curvas de llegada:
+    uniform  llegadas equiespaciadas en la ventana
+    poisson  llegadas aleatorias con tasa constante
+    burst    todos al mismo tiempo
+    peak     la mayoría en el primer tercio de la ventana (triangular)
+
+El resultado (throughput, latencias p50/p95/p99 por paso y total, errores)
+se guarda en JSON para comparar entre versiones.
+
+Uso:
+    python benchmarks/load_test.py [--students 80] [--window 120] [--curve peak]
+        [--workers 16] [--time-scale 0.1] [--db-latency-ms 25] [--output load_test.json]
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Agregar el directorio padre al path para importar los módulos de la app
+sys.path.append(str(Path(__file__).parent.parent))
+
+import database
+
+ARRIVAL_CURVES = ("uniform", "poisson", "burst", "peak")
+
+# Restricciones únicas del esquema de Supabase
+UNIQUE_KEYS = {
+    'attendance': ('DNI', 'MATERIA', 'FECHA'),
+    'device_usage': ('DEVICE_ID', 'MATERIA', 'FECHA'),
+}
+
+
+class _Response:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class _Query:
+    """Consulta estilo postgrest sobre una tabla en memoria"""
+
+    def __init__(self, backend, table):
+        self.backend = backend
+        self.table = table
+        self.action = 'select'
+        self.payload = None
+        self.filters = []
+        self.ordering = None
+        self.row_limit = None
+        self.with_count = False
+
+    def select(self, columns='*', count=None):
+        self.with_count = count is not None
+        return self
+
+    def insert(self, data):
+        self.action, self.payload = 'insert', data
+        return self
+
+    def update(self, data):
+        self.action, self.payload = 'update', data
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def _filter(self, column, test, value):
+        self.filters.append((column, test, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda a, b: a == b, value)
+
+    def neq(self, column, value):
+        return self._filter(column, lambda a, b: a != b, value)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and a > b, value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and a >= b, value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and a < b, value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and a <= b, value)
+
+    def order(self, column, desc=False):
+        self.ordering = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        return self.backend.execute(self)
+
+
+class InMemorySupabase:
+    """Cliente en memoria compatible con las consultas de database.py"""
+
+    def __init__(self, latency_ms=25.0, jitter_ms=10.0, seed=0):
+        self.tables = defaultdict(list)
+        self.unique = defaultdict(set)
+        self.next_id = defaultdict(lambda: 1)
+        self.lock = threading.Lock()
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.random = random.Random(seed)
+        self.requests = Counter()
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def _round_trip(self):
+        # Latencia de red simulada, fuera del lock como en un servidor real
+        with self.lock:
+            delay = max(0.0, self.random.gauss(self.latency, self.jitter))
+        time.sleep(delay)
+
+    def _matches(self, row, filters):
+        return all(test(row.get(column), value) for column, test, value in filters)
+
+    def execute(self, query):
+        self._round_trip()
+        with self.lock:
+            self.requests[f"{query.table}.{query.action}"] += 1
+            rows = self.tables[query.table]
+
+            if query.action == 'insert':
+                return _Response([self._insert(query.table, dict(query.payload))])
+
+            matched = [row for row in rows if self._matches(row, query.filters)]
+            if query.action == 'update':
+                for row in matched:
+                    row.update(query.payload)
+                return _Response([dict(row) for row in matched])
+            if query.action == 'delete':
+                self.tables[query.table] = [row for row in rows if row not in matched]
+                key_columns = UNIQUE_KEYS.get(query.table)
+                for row in matched:
+                    if key_columns:
+                        self.unique[query.table].discard(tuple(row.get(c) for c in key_columns))
+                return _Response([dict(row) for row in matched])
+
+            if query.ordering:
+                column, desc = query.ordering
+                matched.sort(key=lambda row: row.get(column), reverse=desc)
+            count = len(matched) if query.with_count else None
+            if query.row_limit is not None:
+                matched = matched[:query.row_limit]
+            return _Response([dict(row) for row in matched], count)
+
+    def _insert(self, table, row):
+        key_columns = UNIQUE_KEYS.get(table)
+        if key_columns:
+            key = tuple(row.get(c) for c in key_columns)
+            if key in self.unique[table]:
+                raise Exception(f"duplicate key value violates unique constraint on {table} (23505)")
+            self.unique[table].add(key)
+        row.setdefault('id', self.next_id[table])
+        self.next_id[table] += 1
+        self.tables[table].append(row)
+        return row
+
+
+def arrival_times(students, window, curve, rng):
+    """Segundos desde el inicio en que llega cada estudiante"""
+    if curve == "burst":
+        return [0.0] * students
+    if curve == "uniform":
+        return [window * i / max(students, 1) for i in range(students)]
+    if curve == "poisson":
+        rate = students / window if window else float('inf')
+        times, now = [], 0.0
+        for _ in range(students):
+            now += rng.expovariate(rate) if rate != float('inf') else 0.0
+            times.append(min(now, window))
+        return times
+    # peak: distribución triangular con moda en el primer tercio
+    return sorted(rng.triangular(0, window, window / 3) for _ in range(students))
+
+
+def build_students(count, duplicate_rate, shared_device_rate, rng):
+    """Estudiantes virtuales; algunos reenvían el formulario o comparten teléfono"""
+    students = []
+    for i in range(count):
+        students.append({
+            'dni': str(40000000 + i),
+            'name': f"Estudiante {i}",
+            'device_id': f"device-{i}",
+        })
+    for student in students:
+        if rng.random() < shared_device_rate:
+            student['device_id'] = rng.choice(students)['device_id']
+    duplicates = [dict(student) for student in students if rng.random() < duplicate_rate]
+    return students + duplicates
+
+
+def register_student(student, subject, commission, code, date, time_str):
+    """Camino de registro de la app. Devuelve (resultado, tiempos por paso)"""
+    timings = {}
+
+    def timed(step, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[step] = time.perf_counter() - start
+        return result
+
+    if not timed('verify_classroom_code', database.verify_classroom_code, code, subject, commission):
+        return 'codigo_invalido', timings
+    if timed('is_attendance_registered', database.is_attendance_registered, student['dni'], subject, date):
+        return 'ya_registrado', timings
+    if not timed('validate_device_for_subject', database.validate_device_for_subject,
+                 student['device_id'], student['dni'], subject, date):
+        return 'dispositivo_en_uso', timings
+    success, message = timed('register_attendance_transaction', database.register_attendance_transaction,
+                             student['dni'], student['name'], subject, commission, date, time_str,
+                             'load-test', '127.0.0.1', student['device_id'])
+    return ('ok' if success else f"registro: {message}"), timings
+
+
+def percentiles(values):
+    if not values:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99),
+            'max_ms': round(ordered[-1] * 1000, 2), 'mean_ms': round(statistics.fmean(ordered) * 1000, 2)}
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    backend = InMemorySupabase(args.db_latency_ms, args.db_jitter_ms, args.seed)
+    database.get_supabase_client = lambda: backend
+
+    subject, commission, code = "MATEMATICA", "A", "ABC123"
+    date = datetime.date.today().strftime('%Y-%m-%d')
+    expiry = (datetime.datetime.now() + datetime.timedelta(hours=1)).isoformat()
+    backend.tables['classroom_codes'].append(
+        {'CODE': code, 'SUBJECT': subject, 'COMMISSION': commission, 'EXPIRY_TIME': expiry}
+    )
+
+    students = build_students(args.students, args.duplicate_rate, args.shared_device_rate, rng)
+    arrivals = sorted(arrival_times(len(students), args.window, args.curve, rng))
+    rng.shuffle(students)
+    for student in students:
+        if rng.random() < args.invalid_code_rate:
+            student['code'] = "XXXXXX"
+
+    results = []
+    results_lock = threading.Lock()
+    started = time.perf_counter()
+
+    def virtual_student(student, arrival):
+        # La espera por un hilo libre cuenta como latencia
+        scheduled = started + arrival * args.time_scale
+        try:
+            outcome, timings = register_student(student, subject, commission, student.get('code', code),
+                                                date, datetime.datetime.now().strftime('%H:%M:%S'))
+        except Exception as e:
+            outcome, timings = f"excepcion: {type(e).__name__}", {}
+        finished = time.perf_counter()
+        with results_lock:
+            results.append({'outcome': outcome, 'timings': timings,
+                            'latency': finished - max(scheduled, started), 'finished': finished})
+
+    # Los estudiantes se lanzan al llegar; los hilos de trabajo son la capacidad del servidor
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for student, arrival in zip(students, arrivals):
+            wait = started + arrival * args.time_scale - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            executor.submit(virtual_student, student, arrival)
+    elapsed = time.perf_counter() - started
+
+    outcomes = Counter(result['outcome'] for result in results)
+    step_timings = defaultdict(list)
+    for result in results:
+        for step, seconds in result['timings'].items():
+            step_timings[step].append(seconds)
+
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'requests': len(results),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+        'registrations_per_s': round(outcomes['ok'] / elapsed, 2) if elapsed else None,
+        'latency': percentiles([result['latency'] for result in results]),
+        'steps': {step: percentiles(values) for step, values in step_timings.items()},
+        'outcomes': dict(outcomes),
+        'errors': {outcome: count for outcome, count in outcomes.items() if outcome != 'ok'},
+        'db_requests': dict(backend.requests),
+        'attendance_rows': len(backend.tables['attendance']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=80, help="Estudiantes virtuales")
+    parser.add_argument('--window', type=float, default=120, help="Ventana de llegada en segundos")
+    parser.add_argument('--curve', choices=ARRIVAL_CURVES, default="peak", help="Curva de llegada")
+    parser.add_argument('--workers', type=int, default=16, help="Hilos de script concurrentes")
+    parser.add_argument('--time-scale', type=float, default=0.1,
+                        help="Factor de compresión del tiempo de llegada (1 = tiempo real)")
+    parser.add_argument('--db-latency-ms', type=float, default=25, help="Latencia media por consulta")
+    parser.add_argument('--db-jitter-ms', type=float, default=10, help="Desvío de la latencia por consulta")
+    parser.add_argument('--duplicate-rate', type=float, default=0.05,
+                        help="Proporción de estudiantes que reenvían el registro")
+    parser.add_argument('--shared-device-rate', type=float, default=0.02,
+                        help="Proporción de estudiantes que usan el teléfono de otro")
+    parser.add_argument('--invalid-code-rate', type=float, default=0.02,
+                        help="Proporción de estudiantes con código incorrecto")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default="load_test.json", help="Archivo JSON de resultados")
+    args = parser.parse_args()
+
+    report = run(args)
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    latency = report['latency']
+    print(f"{report['requests']} registros en {report['elapsed_s']} s "
+          f"({report['throughput_rps']} req/s, {report['registrations_per_s']} registros/s)")
+    print(f"Latencia p50 {latency['p50_ms']} ms - p95 {latency['p95_ms']} ms - p99 {latency['p99_ms']} ms")
+    for step, stats in report['steps'].items():
+        print(f"  {step:32s} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms")
+    print(f"Resultados: {report['outcomes']}")
+    print(f"Guardado en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
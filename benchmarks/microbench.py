@@ -0,0 +1,221 @@
+"""
+Micro-benchmarks de las funciones de utils.py y network.py que corren en cada rerun
+
+Cada benchmark genera datos sintéticos de varios tamaños (filas de horario o
+IPs), toma el mejor tiempo de varias repeticiones y compara contra un archivo de
+referencia. Si alguna medición supera la referencia en más del umbral
+indicado, el proceso termina con código 1.
+
+Las referencias dependen de la máquina: se guardan con --save-baseline en la
+misma máquina donde luego se compara.
+
+Uso:
+    python benchmarks/microbench.py --save-baseline          # registrar referencia
+    python benchmarks/microbench.py [--threshold 20]         # comparar contra la referencia
+    python benchmarks/microbench.py --only parse_date --sizes 100 1000
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Agregar el directorio padre al path para importar los módulos de la app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils import (
+    validate_time_for_subject, validate_time_for_subject_batch, parse_date, parse_time,
+    parse_date_series, parse_time_series, check_schedule_conflicts
+)
+from network import is_ip_in_allowed_range, get_argentina_datetime
+
+DEFAULT_BASELINE = Path(__file__).parent / "microbench_baseline.json"
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+ALLOWED_RANGES = [f"10.{i}.0.0/16" for i in range(16)] + ["192.168.0.0/16", "172.16.0.0/12"]
+
+
+def generate_schedule(rows, seed=42, short_times=0.3):
+    """
+    Horario sintético: fechas DD/MM/YYYY e ISO, varias comisiones
+    short_times es la proporción de horas en formato HH:MM (el resto HH:MM:SS)
+    """
+    rng = random.Random(seed)
+    start_day = datetime.date(2025, 3, 1)
+    days = max(1, rows // 40)
+    data = []
+    for _ in range(rows):
+        day = start_day + datetime.timedelta(days=rng.randrange(days))
+        start = datetime.datetime.combine(day, datetime.time(rng.randint(7, 21), rng.choice([0, 15, 30, 45])))
+        end = start + datetime.timedelta(minutes=rng.choice([60, 90, 120, 180]))
+        time_format = '%H:%M' if rng.random() < short_times else '%H:%M:%S'
+        data.append({
+            'MATERIA': f"Materia {rng.randrange(50)}",
+            'COMISION': f"Comisión {rng.choice('ABCDEFGH')}",
+            'FECHA': day.strftime('%d/%m/%Y') if rng.random() < 0.5 else day.strftime('%Y-%m-%d'),
+            'INICIO': start.strftime(time_format),
+            'FINAL': end.strftime(time_format),
+        })
+    return pd.DataFrame(data)
+
+
+def generate_ips(count, seed=42):
+    """IPs sintéticas, la mitad dentro de los rangos permitidos"""
+    rng = random.Random(seed)
+    ips = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            ips.append(f"10.{rng.randrange(16)}.{rng.randrange(256)}.{rng.randrange(1, 255)}")
+        else:
+            ips.append(f"{rng.randrange(11, 223)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}")
+    return ips
+
+
+def bench_validate_time_for_subject(size):
+    schedule = generate_schedule(size)
+    now = datetime.datetime(2025, 3, 3, 18, 30)
+    rows = list(zip(schedule['FECHA'], schedule['INICIO'], schedule['FINAL']))
+    return lambda: [validate_time_for_subject(now.date(), now.time(), *row) for row in rows]
+
+
+def bench_validate_time_for_subject_batch(size):
+    schedule = generate_schedule(size)
+    now = datetime.datetime(2025, 3, 3, 18, 30)
+    return lambda: validate_time_for_subject_batch(schedule['FECHA'], schedule['INICIO'], schedule['FINAL'], now)
+
+
+def bench_parse_date(size):
+    dates = generate_schedule(size)['FECHA'].tolist()
+    return lambda: [parse_date(value) for value in dates]
+
+
+def bench_parse_date_series(size):
+    dates = generate_schedule(size)['FECHA']
+    return lambda: parse_date_series(dates)
+
+
+def bench_parse_time(size):
+    times = generate_schedule(size)['INICIO'].tolist()
+    return lambda: [parse_time(value) for value in times]
+
+
+def bench_parse_time_series(size):
+    times = generate_schedule(size)['INICIO']
+    return lambda: parse_time_series(times)
+
+
+def bench_check_schedule_conflicts(size):
+    schedule = generate_schedule(size)
+    return lambda: check_schedule_conflicts(schedule)
+
+
+def bench_is_ip_in_allowed_range(size):
+    ips = generate_ips(size)
+    return lambda: [is_ip_in_allowed_range(ip, ALLOWED_RANGES) for ip in ips]
+
+
+def bench_get_argentina_datetime(size):
+    return lambda: [get_argentina_datetime() for _ in range(size)]
+
+
+BENCHMARKS = {
+    "validate_time_for_subject": bench_validate_time_for_subject,
+    "validate_time_for_subject_batch": bench_validate_time_for_subject_batch,
+    "parse_date": bench_parse_date,
+    "parse_date_series": bench_parse_date_series,
+    "parse_time": bench_parse_time,
+    "parse_time_series": bench_parse_time_series,
+    "check_schedule_conflicts": bench_check_schedule_conflicts,
+    "is_ip_in_allowed_range": bench_is_ip_in_allowed_range,
+    "get_argentina_datetime": bench_get_argentina_datetime,
+}
+
+
+def measure(func, repeat, min_time=0.2, max_time=10.0):
+    """
+    Mejor tiempo de `repeat` mediciones (el mínimo es el menos afectado por ruido)
+    Cada medición repite la llamada hasta durar min_time; las funciones lentas
+    se miden menos veces para no superar max_time
+    """
+    start = time.perf_counter()
+    func()  # calentamiento (imports perezosos, caches)
+    single = time.perf_counter() - start
+    loops = max(1, int(min_time / single)) if single > 0 else 1000
+    repeat = max(1, min(repeat, int(max_time / single))) if single > 0 else repeat
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return min(samples)
+
+
+def run(names, sizes, repeat):
+    results = {}
+    for name in names:
+        for size in sizes:
+            seconds = measure(BENCHMARKS[name](size), repeat)
+            results[f"{name}[{size}]"] = seconds
+            print(f"{name:34s} {size:>8d}  {seconds * 1000:12.3f} ms  {seconds / size * 1e6:10.3f} µs/elem")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Lista de (clave, referencia, actual, cambio %) que superan el umbral"""
+    regressions = []
+    print(f"\nComparación contra la referencia (umbral {threshold:.0f}%):")
+    for key, seconds in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            print(f"  {key:44s} sin referencia")
+            continue
+        change = (seconds / reference - 1) * 100
+        status = "REGRESIÓN" if change > threshold else "ok"
+        print(f"  {key:44s} {reference * 1000:10.3f} -> {seconds * 1000:10.3f} ms  {change:+7.1f}%  {status}")
+        if change > threshold:
+            regressions.append((key, reference, seconds, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Ejecutar solo estos benchmarks")
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES), help="Tamaños de entrada")
+    parser.add_argument('--repeat', type=int, default=5, help="Repeticiones por medición")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Archivo de referencia")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar los resultados como referencia")
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help="Porcentaje de empeoramiento tolerado antes de fallar")
+    args = parser.parse_args()
+
+    results = run(args.only or list(BENCHMARKS), sorted(args.sizes), args.repeat)
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.setdefault('timings', {}).update(results)
+        baseline['python'] = platform.python_version()
+        baseline['machine'] = platform.platform()
+        baseline['recorded_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+        print(f"\nReferencia guardada en {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nNo hay referencia en {args.baseline}; ejecutar con --save-baseline")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline.get('timings', {}), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} mediciones empeoraron más de {args.threshold:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
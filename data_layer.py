@@ -0,0 +1,299 @@
+import copy
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from database import (
+    load_students, load_schedule, load_attendance, load_admin_config,
+    get_attendance_version as fetch_attendance_version
+)
+from utils import (
+    compact_students_df, compact_attendance_df, frame_memory_bytes, check_schedule_conflicts,
+    build_dni_index, build_class_times
+)
+from schedule_index import build_schedule_index, update_schedule_index, remove_from_schedule_index
+
+# Capa de datos compartida por app.py y las páginas de administración
+#
+# Cada tabla vive en una instantánea única por proceso: el DataFrame, su versión y
+# los índices derivados (DNI, materias, intervalos del horario...) que se calculan
+# la primera vez que se piden. Todas las sesiones leen la misma instantánea, nada se
+# copia a session_state. Actualizar una tabla arma una instantánea nueva y cambia el
+# puntero: las sesiones que estaban leyendo la anterior la siguen usando hasta su
+# próximo rerun.
+#
+# Las instantáneas son de solo lectura: quien necesite modificar un DataFrame trabaja
+# sobre uno derivado (filtro, concat, .copy()), que con copy-on-write no toca el
+# compartido. Copy-on-write es el comportamiento de pandas 3; con pandas 2 se activa
+# al importar este módulo. Las escrituras hechas desde la app llaman a invalidate() o
+# publican la instantánea nueva directamente; el TTL cubre los cambios hechos fuera de
+# la app (por ejemplo, desde el panel de Supabase). La asistencia se recarga además cuando
+# cambia su versión en la base (cantidad, último id), consultada cada 30 segundos.
+# Cada vista declara en VIEW_TABLES las tablas que usa: ninguna se descarga hasta que se lee.
+
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+SNAPSHOT_TTL_SECONDS = {'students': 300, 'schedule': 300, 'attendance': 300, 'admin_config': 60}
+
+TABLE_LABELS = {
+    'students': "estudiantes", 'schedule': "horarios",
+    'attendance': "asistencia", 'admin_config': "configuración"
+}
+
+def _load_students_table():
+    students = load_students()
+    compact = compact_students_df(students)
+    return compact, (frame_memory_bytes(students), frame_memory_bytes(compact))
+
+def _load_schedule_table():
+    return load_schedule(), None
+
+def _load_attendance_table():
+    attendance = load_attendance()
+    compact = compact_attendance_df(attendance)
+    return compact, (frame_memory_bytes(attendance), frame_memory_bytes(compact))
+
+def _load_admin_config_table():
+    return load_admin_config(), None
+
+LOADERS = {
+    'students': _load_students_table,
+    'schedule': _load_schedule_table,
+    'attendance': _load_attendance_table,
+    'admin_config': _load_admin_config_table,
+}
+
+@st.cache_resource
+def _snapshot_store():
+    """Instantáneas vigentes de cada tabla, compartidas por todas las sesiones del proceso"""
+    return {
+        'version': 0,
+        'lock': threading.Lock(),
+        'table_locks': {table: threading.Lock() for table in LOADERS},
+        'snapshots': {},
+        'memory': {}
+    }
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_attendance_version():
+    """Versión de la tabla de asistencia (cantidad de registros, último id)"""
+    return fetch_attendance_version()
+
+def _is_fresh(table, snapshot):
+    if snapshot is None or time.time() - snapshot['loaded_at'] > SNAPSHOT_TTL_SECONDS[table]:
+        return False
+    if table == 'attendance':
+        return snapshot['source_version'] == get_attendance_version()
+    return True
+
+def _publish(store, table, data, source_version=None, indexes=None):
+    """Armar la instantánea nueva de una tabla y dejarla vigente"""
+    with store['lock']:
+        store['version'] += 1
+        snapshot = {
+            'table': table,
+            'version': store['version'],
+            'data': data,
+            'loaded_at': time.time(),
+            'source_version': source_version,
+            'indexes': dict(indexes or {}),
+            'index_lock': threading.Lock()
+        }
+        store['snapshots'][table] = snapshot
+    return snapshot
+
+def get_snapshot(table):
+    """
+    Instantánea vigente de una tabla, cargándola si falta o venció
+    Si varias sesiones la piden a la vez, solo una consulta la base y las demás esperan
+    """
+    store = _snapshot_store()
+    snapshot = store['snapshots'].get(table)
+    if _is_fresh(table, snapshot):
+        return snapshot
+
+    with store['table_locks'][table]:
+        snapshot = store['snapshots'].get(table)
+        if _is_fresh(table, snapshot):
+            return snapshot
+
+        source_version = get_attendance_version() if table == 'attendance' else None
+        with st.spinner(f"Cargando {TABLE_LABELS[table]}..."):
+            data, memory = LOADERS[table]()
+        if memory is not None:
+            store['memory'][table] = memory
+        return _publish(store, table, data, source_version)
+
+def snapshot_index(snapshot, name, builder):
+    """Índice derivado de una instantánea: se calcula una vez y lo comparten todas las sesiones"""
+    indexes = snapshot['indexes']
+    if name not in indexes:
+        with snapshot['index_lock']:
+            if name not in indexes:
+                indexes[name] = builder(snapshot['data'])
+    return indexes[name]
+
+def snapshot_version(table):
+    return get_snapshot(table)['version']
+
+def invalidate(table):
+    """Descartar la instantánea de una tabla modificada: la próxima lectura la recarga"""
+    if table == 'attendance':
+        get_attendance_version.clear()
+    store = _snapshot_store()
+    with store['lock']:
+        store['snapshots'].pop(table, None)
+
+def get_students():
+    """Estudiantes en representación compacta (dni int64, strings repetidos como categorías)"""
+    return get_snapshot('students')['data']
+
+def get_schedule():
+    return get_snapshot('schedule')['data']
+
+def get_attendance():
+    """Asistencia completa en representación compacta (FECHA datetime, HORA en minutos)"""
+    return get_snapshot('attendance')['data']
+
+def get_admin_config():
+    """Copia de la configuración: quien la lee suele modificarla antes de guardarla"""
+    return copy.deepcopy(get_snapshot('admin_config')['data'])
+
+# Tablas que necesita cada vista. Ninguna vista de estudiantes incluye la asistencia:
+# las verificaciones del registro (asistencia ya registrada, dispositivo ya usado) son
+# consultas puntuales a la base, y la tabla completa solo se descarga para el administrador
+VIEW_TABLES = {
+    'student_registration': ('students', 'schedule', 'admin_config'),
+    'admin_attendance': ('students', 'schedule', 'attendance'),
+    'admin_schedules': ('students', 'schedule'),
+    'reports': ('students', 'schedule'),
+    'configuration': ('admin_config',),
+}
+
+def load_view(view):
+    """Cargar solo las tablas que usa la vista; devuelve {tabla: versión} de lo que leyó"""
+    return {table: snapshot_version(table) for table in VIEW_TABLES[view]}
+
+def data_version():
+    """Versiones de las instantáneas de estudiantes y horarios que leyó esta ejecución"""
+    return (snapshot_version('students'), snapshot_version('schedule'))
+
+# Índices derivados de los estudiantes
+
+def _dni_key(dni):
+    # Mismo criterio que dni_mask: "012" y 12 son el mismo DNI numérico
+    dni = str(dni).strip()
+    return str(int(dni)) if dni.isdigit() else dni
+
+def _subjects(students):
+    if students.empty or 'materia' not in students.columns:
+        return []
+    return sorted(students['materia'].dropna().astype(str).unique().tolist())
+
+def _commissions(students):
+    if students.empty or 'materia' not in students.columns:
+        return {}
+    pairs = students[['materia', 'comision']].dropna().astype(str).drop_duplicates()
+    return {subject: sorted(group['comision'].tolist()) for subject, group in pairs.groupby('materia')}
+
+def _enrollments(students):
+    enrollments = {}
+    if students.empty or 'dni' not in students.columns:
+        return enrollments
+    for dni, subject, commission in zip(students['dni'], students['materia'], students['comision']):
+        enrollments.setdefault(_dni_key(dni), []).append((subject, commission))
+    return enrollments
+
+def get_subjects():
+    """Materias con estudiantes inscriptos"""
+    return snapshot_index(get_snapshot('students'), 'subjects', _subjects)
+
+def get_commissions(subject):
+    """Comisiones de una materia"""
+    return snapshot_index(get_snapshot('students'), 'commissions', _commissions).get(subject, [])
+
+def get_dni_index():
+    """Índice ordenado de DNIs para la búsqueda por prefijo"""
+    return snapshot_index(get_snapshot('students'), 'dni', lambda students: build_dni_index(students['dni']))
+
+def get_student_enrollments(dni):
+    """Lista de (materia, comisión) del estudiante, sin recorrer la tabla"""
+    return snapshot_index(get_snapshot('students'), 'enrollments', _enrollments).get(_dni_key(dni), [])
+
+# Índices derivados del horario
+
+def _catalog(schedule):
+    if schedule.empty:
+        return {"materias": [], "comisiones": []}
+    return {
+        "materias": sorted(schedule["MATERIA"].dropna().unique().tolist()),
+        "comisiones": sorted(schedule["COMISION"].dropna().unique().tolist())
+    }
+
+def get_schedule_catalog():
+    """Materias y comisiones del horario, para los filtros"""
+    return snapshot_index(get_snapshot('schedule'), 'catalog', _catalog)
+
+def get_class_times(subject, commission):
+    """Horarios parseados de una clase: [(fecha, minuto de inicio, minuto de fin), ...]"""
+    return snapshot_index(get_snapshot('schedule'), 'class_times', build_class_times).get((subject, commission), [])
+
+def get_schedule_conflicts():
+    return snapshot_index(get_snapshot('schedule'), 'conflicts', check_schedule_conflicts)
+
+def get_schedule_index():
+    """Índice de intervalos del horario, para validar altas y cambios"""
+    return snapshot_index(get_snapshot('schedule'), 'intervals', build_schedule_index)
+
+def apply_schedule_change(row=None, removed_id=None):
+    """
+    Publicar el horario con un alta, cambio o baja ya guardados en la base
+    Se arma a partir de la instantánea vigente, sin volver a consultar la tabla; el índice
+    de intervalos se actualiza sobre una copia para no tocar el que leen otras sesiones
+    """
+    get_snapshot('schedule')
+    store = _snapshot_store()
+    with store['table_locks']['schedule']:
+        snapshot = store['snapshots'].get('schedule')
+        if snapshot is None:
+            return
+
+        schedule_df = snapshot['data']
+        schedule_index = copy.deepcopy(snapshot_index(snapshot, 'intervals', build_schedule_index))
+        row_id = removed_id if row is None else row.get('id')
+
+        if row is None:
+            schedule_df = schedule_df[schedule_df['id'] != row_id]
+            remove_from_schedule_index(schedule_index, row_id)
+        elif 'id' in schedule_df.columns and (schedule_df['id'] == row_id).any():
+            schedule_df = schedule_df.copy()
+            for column, value in row.items():
+                if column in schedule_df.columns:
+                    schedule_df.loc[schedule_df['id'] == row_id, column] = value
+            update_schedule_index(schedule_index, row)
+        else:
+            schedule_df = pd.concat([schedule_df, pd.DataFrame([row])], ignore_index=True)
+            update_schedule_index(schedule_index, row)
+
+        _publish(store, 'schedule', schedule_df, indexes={'intervals': schedule_index})
+
+def get_memory_report():
+    """Memoria de las tablas ya cargadas (no descarga las que faltan)"""
+    return dict(_snapshot_store()['memory'])
+
+def snapshot_summary():
+    """Instantáneas vigentes: tabla, versión, filas y antigüedad"""
+    now = time.time()
+    return [
+        {
+            'tabla': table,
+            'versión': snapshot['version'],
+            'filas': len(snapshot['data']) if isinstance(snapshot['data'], pd.DataFrame) else None,
+            'índices': ", ".join(sorted(snapshot['indexes'])),
+            'antigüedad (s)': int(now - snapshot['loaded_at'])
+        }
+        for table, snapshot in sorted(_snapshot_store()['snapshots'].items())
+    ]
@@ -2,7 +2,6 @@ import datetime
 import os
 import pandas as pd
 import streamlit as st
-from supabase import create_client
 
 # Obtener cliente Supabase
 def get_supabase_client():
@@ -22,6 +21,8 @@ def get_supabase_client():
                 st.error("No se encontraron credenciales de Supabase")
                 return None
         
+        # supabase se importa en el primer uso para no demorar el arranque
+        from supabase import create_client
         return create_client(supabase_url, supabase_key)
     except Exception as e:
         st.error(f"Error connecting to Supabase: {str(e)}")
@@ -112,6 +113,79 @@ def save_attendance(dni, name, subject, commission, date, time, device, ip, devi
         st.error(f"Error al guardar asistencia: {str(e)}")
         return False
 
+def register_attendance_transaction(dni, name, subject, commission, date, time, device, ip, device_id):
+    """Guardar registro de asistencia usando una transacción para evitar duplicados"""
+    supabase = get_supabase_client()
+    if not supabase:
+        return False, "No se pudo conectar a la base de datos"
+    
+    # Asegurar formato de fecha para Supabase
+    if isinstance(date, str) and '/' in date:
+        # Convertir dd/mm/yyyy a formato ISO
+        date_parts = date.split('/')
+        date = f"{date_parts[2]}-{date_parts[1]}-{date_parts[0]}"
+    
+    try:
+        # Verificar si el dispositivo ya fue usado para esta materia y fecha
+        device_check = supabase.table('device_usage')\
+            .select('*')\
+            .eq('DEVICE_ID', device_id)\
+            .eq('MATERIA', subject)\
+            .eq('FECHA', date)\
+            .execute()
+        
+        if len(device_check.data) > 0:
+            return False, "Este dispositivo ya ha sido utilizado para registrar asistencia en esta materia y fecha"
+        
+        # Verificar si la asistencia ya está registrada
+        attendance_check = supabase.table('attendance')\
+            .select('*')\
+            .eq('DNI', dni)\
+            .eq('MATERIA', subject)\
+            .eq('FECHA', date)\
+            .execute()
+        
+        if len(attendance_check.data) > 0:
+            return False, "Ya registraste tu asistencia para esta materia y fecha"
+        
+        # Datos a insertar
+        attendance_data = {
+            'DNI': dni,
+            'APELLIDO Y NOMBRE': name,
+            'MATERIA': subject,
+            'COMISION': commission,
+            'FECHA': date,
+            'HORA': time,
+            'DISPOSITIVO': device,
+            'IP': ip,
+            'DEVICE_ID': device_id
+        }
+        
+        device_data = {
+            'DEVICE_ID': device_id,
+            'DNI': dni,
+            'MATERIA': subject,
+            'FECHA': date,
+            'TIMESTAMP': datetime.datetime.now().isoformat()
+        }
+        
+        # Realizar ambas inserciones
+        supabase.table('attendance').insert(attendance_data).execute()
+        supabase.table('device_usage').insert(device_data).execute()
+        
+        return True, "Asistencia registrada correctamente"
+        
+    except Exception as e:
+        error_msg = str(e)
+        # Si es error de clave duplicada
+        if "23505" in error_msg:
+            if "device_usage" in error_msg:
+                return False, "Este dispositivo ya fue utilizado para registrar asistencia en esta materia y fecha"
+            else:
+                return False, "Ya existe un registro con estos datos"
+        else:
+            return False, f"Error al registrar asistencia: {error_msg}"
+
 def is_attendance_registered(dni, subject, date):
     """Verificar si la asistencia ya está registrada"""
     supabase = get_supabase_client()
@@ -297,6 +371,85 @@ def get_attendance_report(date=None, subject=None, commission=None):
     response = query.execute()
     return pd.DataFrame(response.data)
 
+def get_attendance_version():
+    """
+    Versión de la tabla de asistencia: (cantidad de registros, último id)
+    Sirve como clave de cache para exportaciones sin descargar la tabla
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return (0, None)
+    
+    response = supabase.table('attendance').select('id', count='exact')\
+        .order('id', desc=True)\
+        .limit(1)\
+        .execute()
+    
+    last_id = response.data[0]['id'] if response.data else None
+    return (response.count or 0, last_id)
+
+# Registros por página en el navegador de asistencia
+ATTENDANCE_PAGE_SIZE = 50
+
+def get_attendance_page(before_id=None, limit=ATTENDANCE_PAGE_SIZE, date_from=None, date_to=None,
+                        subject=None, commission=None, dni=None):
+    """
+    Obtener una página de asistencia, del registro más nuevo al más viejo
+    Los filtros se aplican en la base de datos y la paginación es por id (keyset):
+    la página siguiente se pide con before_id = menor id de la página actual
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return pd.DataFrame()
+    
+    query = supabase.table('attendance').select('*')
+    
+    if date_from:
+        query = query.gte('FECHA', date_from)
+    
+    if date_to:
+        query = query.lte('FECHA', date_to)
+    
+    if subject:
+        query = query.eq('MATERIA', subject)
+    
+    if commission:
+        query = query.eq('COMISION', commission)
+    
+    if dni:
+        query = query.eq('DNI', dni)
+    
+    if before_id is not None:
+        query = query.lt('id', before_id)
+    
+    response = query.order('id', desc=True).limit(limit).execute()
+    return pd.DataFrame(response.data)
+
+def iter_attendance_chunks(chunk_size=1000, **filters):
+    """
+    Recorrer la tabla de asistencia en bloques (paginación por id)
+    Acepta los mismos filtros que get_attendance_page
+    """
+    before_id = None
+    while True:
+        chunk = get_attendance_page(before_id=before_id, limit=chunk_size, **filters)
+        if chunk.empty:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        before_id = int(chunk['id'].min())
+
+def load_attendance_between(date_from=None, date_to=None, subject=None, commission=None):
+    """
+    Asistencia de un período (FECHA en formato YYYY-MM-DD), filtrada en la base de datos
+    """
+    chunks = list(iter_attendance_chunks(date_from=date_from, date_to=date_to,
+                                         subject=subject, commission=commission))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
 def get_schedule_by_date(date):
     """Get schedule for a specific date"""
     supabase = get_supabase_client()
@@ -0,0 +1,17 @@
+from pathlib import Path
+
+import streamlit.components.v1 as components
+
+# Componente HTML estático: devuelve un token persistente guardado en el navegador
+_device_token_component = components.declare_component(
+    "device_token",
+    path=str(Path(__file__).parent / "components" / "device_token")
+)
+
+def device_token(key="device_token"):
+    """
+    Token persistente del navegador (localStorage + cookie "device_token")
+    Returns:
+        str con el token o None hasta que el navegador responde
+    """
+    return _device_token_component(key=key, default=None)
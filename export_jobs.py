@@ -0,0 +1,190 @@
+import itertools
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from exports import EXPORT_FORMATS, excel_cell_value
+
+# Exportaciones simultáneas en segundo plano
+EXPORT_JOB_WORKERS = 2
+# Trabajos que se conservan en el panel (los más viejos se eliminan junto con su archivo)
+MAX_EXPORT_JOBS = 20
+
+# Registro de trabajos compartido por todas las sesiones del proceso
+_executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix="export-job")
+_jobs = {}
+_jobs_lock = threading.Lock()
+_job_ids = itertools.count(1)
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.file, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+class _ExcelWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet(title="Asistencia")
+        self.header = True
+
+    def write(self, chunk):
+        if self.header:
+            self.worksheet.append([str(column) for column in chunk.columns])
+            self.header = False
+        for row in chunk.itertuples(index=False, name=None):
+            self.worksheet.append([excel_cell_value(value) for value in row])
+
+    def close(self):
+        self.workbook.save(self.path)
+
+class _ParquetWriter:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.writer is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            self.schema = table.schema
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+_WRITERS = {"CSV": _CsvWriter, "Excel": _ExcelWriter, "Parquet": _ParquetWriter}
+
+def _update_job(job_id, **changes):
+    with _jobs_lock:
+        if job_id in _jobs:
+            _jobs[job_id].update(changes)
+
+def _run_job(job_id, chunks, export_format):
+    job = get_export_job(job_id)
+    _update_job(job_id, status="running", started_at=time.time())
+
+    rows = 0
+    try:
+        writer = _WRITERS[export_format](job["path"])
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            writer.write(chunk)
+            rows += len(chunk)
+            total = job["total_rows"]
+            _update_job(job_id, rows=rows, progress=min(rows / total, 1.0) if total else 0.0)
+        writer.close()
+    except Exception as e:
+        _update_job(job_id, status="error", error=str(e), finished_at=time.time())
+        return
+
+    _update_job(job_id, status="done", rows=rows, progress=1.0, finished_at=time.time())
+
+def _evict_old_jobs():
+    # Se llama con el lock tomado
+    finished = [job for job in _jobs.values() if job["status"] in ("done", "error")]
+    while len(_jobs) > MAX_EXPORT_JOBS and finished:
+        oldest = min(finished, key=lambda job: job["created_at"])
+        finished.remove(oldest)
+        del _jobs[oldest["id"]]
+        if os.path.exists(oldest["path"]):
+            os.remove(oldest["path"])
+
+def submit_export_job(name, chunks, total_rows, export_format, file_name):
+    """
+    Encolar una exportación en segundo plano
+    Parameters:
+        name (str): descripción que se muestra en el panel
+        chunks (iterable): DataFrames que se escriben en orden en un archivo temporal
+        total_rows (int): filas esperadas, para calcular el progreso
+        export_format (str): "Excel", "CSV" o "Parquet"
+        file_name (str): nombre del archivo para la descarga
+    Returns:
+        int id del trabajo
+    """
+    extension, mime = EXPORT_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=f".{extension}")
+    os.close(fd)
+
+    with _jobs_lock:
+        job_id = next(_job_ids)
+        _jobs[job_id] = {
+            "id": job_id,
+            "name": name,
+            "format": export_format,
+            "file_name": file_name,
+            "mime": mime,
+            "path": path,
+            "status": "queued",
+            "rows": 0,
+            "total_rows": total_rows,
+            "progress": 0.0,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        _evict_old_jobs()
+
+    _executor.submit(_run_job, job_id, chunks, export_format)
+    return job_id
+
+def get_export_job(job_id):
+    """Copia del estado de un trabajo o None si no existe"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+def list_export_jobs():
+    """Estado de todos los trabajos, del más nuevo al más viejo"""
+    with _jobs_lock:
+        jobs = [dict(job) for job in _jobs.values()]
+    return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+def job_duration(job):
+    """Duración en segundos de un trabajo (hasta ahora si sigue en curso)"""
+    if not job["started_at"]:
+        return 0.0
+    return (job["finished_at"] or time.time()) - job["started_at"]
+
+def read_export_file(job_id):
+    """Contenido del archivo de un trabajo terminado"""
+    job = get_export_job(job_id)
+    if not job or job["status"] != "done":
+        return None
+    with open(job["path"], 'rb') as exported:
+        return exported.read()
+
+def jobs_summary_df():
+    """Tabla de trabajos para el panel de administración"""
+    rows = []
+    for job in list_export_jobs():
+        rows.append({
+            "ID": job["id"],
+            "Exportación": job["name"],
+            "Formato": job["format"],
+            "Estado": job["status"],
+            "Progreso": round(job["progress"] * 100),
+            "Filas": job["rows"],
+            "Duración (s)": round(job_duration(job), 1),
+        })
+    return pd.DataFrame(rows)
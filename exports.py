@@ -0,0 +1,73 @@
+from io import BytesIO
+
+import pandas as pd
+
+# A partir de esta cantidad de filas el Excel se escribe en modo streaming (write_only)
+STREAMING_EXCEL_THRESHOLD = 5000
+# A partir de esta cantidad de filas la exportación se hace en segundo plano (ver export_jobs)
+BACKGROUND_EXPORT_THRESHOLD = 50000
+
+EXPORT_FORMATS = {
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Formatos que guardan varias hojas en un mismo archivo; los demás exportan una sola tabla
+MULTI_SHEET_FORMATS = ("Excel",)
+
+def available_formats():
+    """Formatos de exportación disponibles (Parquet requiere pyarrow)"""
+    formats = ["Excel", "CSV"]
+    try:
+        import pyarrow  # noqa: F401
+        formats.append("Parquet")
+    except ImportError:
+        pass
+    return formats
+
+def excel_cell_value(value):
+    # openpyxl no acepta NaN/NaT ni tipos numpy en modo write_only
+    if pd.isna(value):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def _write_excel_streaming(sheets, buffered):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.create_sheet(title=sheet_name)
+        worksheet.append([str(column) for column in df.columns])
+        for row in df.itertuples(index=False, name=None):
+            worksheet.append([excel_cell_value(value) for value in row])
+    workbook.save(buffered)
+
+def export_frames(sheets, export_format):
+    """
+    Exportar uno o más DataFrames
+    Parameters:
+        sheets (dict): nombre de hoja -> DataFrame. CSV y Parquet admiten una sola hoja
+        export_format (str): "Excel", "CSV" o "Parquet"
+    Returns:
+        bytes del archivo
+    """
+    if export_format not in MULTI_SHEET_FORMATS and len(sheets) > 1:
+        raise ValueError(f"{export_format} no admite varias hojas: exporte cada tabla por separado")
+    first_df = next(iter(sheets.values()))
+
+    if export_format == "CSV":
+        return first_df.to_csv(index=False).encode('utf-8')
+
+    buffered = BytesIO()
+    if export_format == "Parquet":
+        first_df.to_parquet(buffered, index=False)
+    elif sum(len(df) for df in sheets.values()) > STREAMING_EXCEL_THRESHOLD:
+        _write_excel_streaming(sheets, buffered)
+    else:
+        with pd.ExcelWriter(buffered, engine='openpyxl') as writer:
+            for sheet_name, df in sheets.items():
+                df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return buffered.getvalue()
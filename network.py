@@ -1,3 +1,4 @@
+import bisect
 import ipaddress
 import socket
 import subprocess
@@ -6,6 +7,7 @@ import re
 import datetime
 import pytz
 import os
+from functools import lru_cache
 
 def check_wifi_connection():
     """
@@ -101,23 +103,134 @@ def is_ip_in_range(ip, range_start, range_end):
     # Check if IP is in range
     return start_int <= ip_int <= end_int
 
+def parse_ip_range(range_cidr):
+    """
+    Interpretar un rango CIDR IPv4 o IPv6 (una IP sola equivale a /32 o /128)
+    Returns:
+        ipaddress.IPv4Network/IPv6Network o None si el formato es inválido
+    """
+    try:
+        return ipaddress.ip_network(str(range_cidr).strip(), strict=False)
+    except ValueError:
+        return None
+
+def _merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [start for start, _ in merged], [end for _, end in merged]
+
+@lru_cache(maxsize=32)
+def compile_allowed_ranges(allowed_ranges):
+    """
+    Compilar la lista de rangos permitidos una sola vez por configuración
+    Parameters:
+        allowed_ranges (tuple): rangos CIDR; los inválidos se ignoran
+    Returns:
+        dict versión IP (4/6) -> (inicios, fines) de intervalos enteros ordenados y fusionados
+    """
+    intervals = {4: [], 6: []}
+    for range_cidr in allowed_ranges:
+        network = parse_ip_range(range_cidr)
+        if network is not None:
+            intervals[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+    return {version: _merge_intervals(values) for version, values in intervals.items()}
+
 def is_ip_in_allowed_range(ip, allowed_ranges):
     """
     Check if an IP address is within any of the allowed CIDR ranges
     Parameters:
-        ip (str): The IP address to check
+        ip (str): The IP address to check (IPv4 or IPv6)
         allowed_ranges (list): List of allowed CIDR ranges (e.g., ["192.168.1.0/24"])
     Returns:
         bool: True if the IP is in any allowed range, False otherwise
     """
-    ip_obj = ipaddress.IPv4Address(ip)
+    try:
+        ip_obj = ipaddress.ip_address(str(ip).strip())
+    except ValueError:
+        return False
+    # Las IPv4 que llegan como IPv6 (::ffff:a.b.c.d) se comparan contra los rangos IPv4
+    if ip_obj.version == 6 and ip_obj.ipv4_mapped is not None:
+        ip_obj = ip_obj.ipv4_mapped
     
+    starts, ends = compile_allowed_ranges(tuple(allowed_ranges))[ip_obj.version]
+    value = int(ip_obj)
+    position = bisect.bisect_right(starts, value) - 1
+    return position >= 0 and value <= ends[position]
+
+def analyze_ip_ranges(allowed_ranges):
+    """
+    Revisar una lista de rangos para el editor de administración
+    Returns:
+        list de (rango, problema): formato inválido, duplicados y rangos contenidos en otro
+    """
+    issues = []
+    seen = {}
+    parsed = []
     for range_cidr in allowed_ranges:
-        network = ipaddress.IPv4Network(range_cidr, strict=False)
-        if ip_obj in network:
-            return True
+        network = parse_ip_range(range_cidr)
+        if network is None:
+            issues.append((range_cidr, "formato CIDR inválido"))
+        elif network in seen:
+            issues.append((range_cidr, f"duplicado de {seen[network]}"))
+        else:
+            seen[network] = range_cidr
+            parsed.append((range_cidr, network))
+    
+    # Los bloques CIDR no se superponen parcialmente: o son disjuntos o uno contiene al otro
+    for range_cidr, network in parsed:
+        for other_cidr, other in parsed:
+            if other is not network and other.version == network.version \
+                    and other.prefixlen < network.prefixlen and network.subnet_of(other):
+                issues.append((range_cidr, f"redundante, ya incluido en {other_cidr}"))
+                break
+    return issues
+
+# Proxies cuyas cabeceras X-Forwarded-For se aceptan (configurable en admin_config.trusted_proxies)
+DEFAULT_TRUSTED_PROXIES = ("127.0.0.0/8", "::1/128")
+
+def resolve_client_ip(remote_addr, forwarded_for=None, trusted_proxies=DEFAULT_TRUSTED_PROXIES):
+    """
+    Determinar la IP del cliente a partir de la conexión y la cabecera X-Forwarded-For
+    La cadena se recorre de derecha a izquierda salteando los proxies de confianza:
+    si la conexión no viene de un proxy de confianza, la cabecera se ignora
+    Parameters:
+        remote_addr (str): dirección de la conexión (None se toma como 127.0.0.1)
+        forwarded_for (str): valor de X-Forwarded-For, direcciones separadas por coma
+        trusted_proxies (iterable): rangos CIDR de los proxies de confianza
+    Returns:
+        str con la IP del cliente, o None si la cadena tiene un valor que no es una IP
+    """
+    chain = [hop.strip() for hop in (forwarded_for or "").split(",") if hop.strip()]
+    chain.append(remote_addr or "127.0.0.1")
+    trusted = tuple(trusted_proxies)
     
-    return False
+    client_ip = chain[-1]
+    for hop in reversed(chain):
+        if parse_ip_range(hop) is None:
+            # Valor que no es una IP: no se sabe quién es el cliente, y la dirección del
+            # proxy de confianza anterior no puede ocupar su lugar
+            return None
+        client_ip = hop
+        if not is_ip_in_allowed_range(hop, trusted):
+            break
+    return client_ip
+
+def client_ip_from_context(context, trusted_proxies=DEFAULT_TRUSTED_PROXIES):
+    """
+    IP del cliente de la solicitud actual a partir de st.context, sin procesos externos
+    """
+    headers = getattr(context, 'headers', None) or {}
+    return resolve_client_ip(
+        getattr(context, 'ip_address', None),
+        headers.get('X-Forwarded-For'),
+        trusted_proxies
+    )
 
 def get_argentina_datetime():
     """
@@ -213,6 +326,18 @@ def get_device_id():
     
     return device_hash
 
+def device_fingerprint(client_token, phone_number):
+    """
+    ID de dispositivo a partir del token persistente del navegador y del teléfono del estudiante
+    No usa datos del servidor (MAC, hostname) ni procesos externos
+    """
+    import hashlib
+    
+    clean_phone = ''.join(filter(str.isdigit, str(phone_number or '')))
+    phone_hash = hashlib.sha256(clean_phone.encode()).hexdigest()
+    combined = f"{client_token}_{phone_hash}"
+    return hashlib.sha256(combined.encode()).hexdigest()[:16]
+
 def get_device_id_from_phone(phone_number):
     """
     Genera un device_id basado en el número de teléfono del estudiante
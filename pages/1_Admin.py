@@ -1,23 +1,153 @@
 import streamlit as st
-import pandas as pd
 import datetime
-from io import BytesIO
 import socket
 from pathlib import Path
 import sys
 import os
-import ipaddress
 
 # Add parent directory to path to import from parent modules
 sys.path.append(str(Path(__file__).parent.parent))
 
 from database import (
-    load_students, load_attendance, load_schedule, load_admin_config,
-    save_admin_config, get_unique_subjects, get_commissions_by_subject,
-    get_attendance_report
+    load_attendance, save_admin_config, get_attendance_report, get_attendance_page,
+    iter_attendance_chunks, load_attendance_between
 )
-from utils import check_schedule_conflicts
-from network import is_ip_in_allowed_range, get_local_ip
+from data_layer import (
+    get_students, get_schedule, get_admin_config, get_subjects, get_commissions,
+    get_schedule_conflicts, get_attendance_version, data_version, load_view, invalidate
+)
+from exports import (
+    export_frames, available_formats, EXPORT_FORMATS, MULTI_SHEET_FORMATS, BACKGROUND_EXPORT_THRESHOLD
+)
+from export_jobs import (
+    submit_export_job, list_export_jobs, jobs_summary_df, read_export_file,
+    EXPORT_JOB_WORKERS
+)
+from analytics import absence_roster
+from network import (
+    is_ip_in_allowed_range, analyze_ip_ranges, parse_ip_range, client_ip_from_context,
+    DEFAULT_TRUSTED_PROXIES
+)
+
+# Registros del historial que se muestran en pantalla
+HISTORY_PREVIEW_ROWS = 50
+
+# Cada vista carga solo las tablas declaradas en VIEW_TABLES: la configuración no
+# descarga estudiantes, horarios ni asistencia, y los informes consultan la asistencia
+# filtrada en la base, cacheada por la versión (cantidad, último id)
+
+@st.cache_data(ttl=600, max_entries=20)
+def get_attendance_report_cached(version, report_filters):
+    return get_attendance_report(**dict(report_filters))
+
+@st.cache_data(ttl=600, max_entries=5)
+def get_latest_attendance_cached(version):
+    return get_attendance_page(limit=HISTORY_PREVIEW_ROWS)
+
+# Ausentes de un período: inscriptos sin asistencia en cada sesión programada
+# La clave incluye las versiones de las instantáneas de estudiantes y horarios (data_version)
+@st.cache_data(ttl=600, max_entries=20, show_spinner="Calculando ausentes...")
+def get_absence_roster_cached(version, snapshot_versions, absence_filters):
+    filters = dict(absence_filters)
+    attendance = load_attendance_between(**filters)
+    return absence_roster(get_students(), get_schedule(), attendance, **filters)
+
+def report_absence_filters(report_filters):
+    filters = dict(report_filters)
+    return (
+        ("date_from", filters["date"]),
+        ("date_to", filters["date"]),
+        ("subject", filters["subject"]),
+        ("commission", filters["commission"])
+    )
+
+# Exportaciones: se generan solo a pedido y se cachean por versión de datos, filtros y formato
+@st.cache_data(ttl=600, max_entries=20, show_spinner="Generando archivo...")
+def build_report_export(version, snapshot_versions, report_filters, export_format):
+    sheets = {"Asistencia": get_attendance_report_cached(version, report_filters)}
+    # Los formatos de una sola hoja descargan los ausentes aparte (build_absence_export)
+    if export_format in MULTI_SHEET_FORMATS:
+        sheets["Ausentes"] = get_absence_roster_cached(version, snapshot_versions, report_absence_filters(report_filters))
+    return export_frames(sheets, export_format)
+
+@st.cache_data(ttl=600, max_entries=20, show_spinner="Generando archivo...")
+def build_absence_export(version, snapshot_versions, absence_filters, export_format):
+    absences = get_absence_roster_cached(version, snapshot_versions, absence_filters)
+    return export_frames({"Ausentes": absences}, export_format)
+
+def export_full_history(export_format):
+    return export_frames({"Asistencia": load_attendance()}, export_format)
+
+@st.cache_data(ttl=600, max_entries=4, show_spinner="Generando historial completo...")
+def build_history_export(version, export_format):
+    return export_full_history(export_format)
+
+# Filas por bloque al escribir exportaciones en segundo plano
+EXPORT_CHUNK_SIZE = 1000
+
+def forget_evicted_jobs(jobs=None):
+    """Olvidar los trabajos que el registro ya eliminó, para poder volver a pedirlos"""
+    requested_jobs = st.session_state.setdefault('export_jobs', {})
+    existing = {job["id"] for job in (list_export_jobs() if jobs is None else jobs)}
+    for key in [key for key, job_id in requested_jobs.items() if job_id not in existing]:
+        del requested_jobs[key]
+    return requested_jobs
+
+def request_export_job(key, name, chunks, total_rows, export_format, file_name):
+    """Encolar la exportación una sola vez por clave y avisar al administrador"""
+    requested_jobs = forget_evicted_jobs()
+    if key not in requested_jobs:
+        requested_jobs[key] = submit_export_job(name, chunks, total_rows, export_format, file_name)
+    st.info("La exportación se está generando en segundo plano. "
+            "La descarga aparecerá en 'Exportaciones en Segundo Plano'.")
+
+def _export_jobs_progress(was_running):
+    jobs = list_export_jobs()
+    running = any(job["status"] in ("queued", "running") for job in jobs)
+    
+    # Al terminar, recargar la página completa para mostrar las descargas
+    if was_running and not running:
+        st.rerun(scope="app")
+    
+    st.dataframe(
+        jobs_summary_df(),
+        column_config={
+            "Progreso": st.column_config.ProgressColumn("Progreso", min_value=0, max_value=100, format="%d%%")
+        },
+        hide_index=True
+    )
+    st.caption(f"Trabajadores: {EXPORT_JOB_WORKERS}")
+
+def export_jobs_panel():
+    jobs = list_export_jobs()
+    forget_evicted_jobs(jobs)
+    if not jobs:
+        st.info("No hay exportaciones en segundo plano.")
+        return
+    
+    # Mientras haya trabajos en curso, el progreso se actualiza cada 2 segundos
+    running = any(job["status"] in ("queued", "running") for job in jobs)
+    st.fragment(_export_jobs_progress, run_every=2 if running else None)(running)
+    
+    # El archivo se lee del disco solo para el trabajo que el administrador elige descargar
+    for job in jobs:
+        if job["status"] == "done":
+            exported = None
+            if st.session_state.get('export_job_download') == job["id"]:
+                exported = read_export_file(job["id"])
+            if exported is not None:
+                st.download_button(
+                    label=f"Descargar {job['file_name']} ({job['rows']} filas)",
+                    data=exported,
+                    file_name=job["file_name"],
+                    mime=job["mime"],
+                    key=f"export_job_{job['id']}"
+                )
+            elif st.button(f"Preparar descarga de {job['file_name']}", key=f"prepare_export_job_{job['id']}"):
+                st.session_state.export_job_download = job["id"]
+                st.rerun()
+        elif job["status"] == "error":
+            st.error(f"{job['name']}: {job['error']}")
 
 # Set page config
 st.set_page_config(
@@ -52,6 +182,7 @@ with st.sidebar:
 # Main content based on selected option
 if admin_option == "Generar Informes":
     st.header("Generar Informes de Asistencia")
+    load_view('reports')
     
     col1, col2 = st.columns(2)
     
@@ -66,12 +197,12 @@ if admin_option == "Generar Informes":
         report_date_str = report_date.strftime('%Y-%m-%d')
         
         # Subject selection
-        subjects = ["Todos"] + get_unique_subjects()
+        subjects = ["Todos"] + get_subjects()
         selected_subject = st.selectbox("Seleccione materia:", subjects)
         
         # Commission selection (depends on subject)
         if selected_subject != "Todos":
-            commissions = ["Todos"] + get_commissions_by_subject(selected_subject)
+            commissions = ["Todos"] + get_commissions(selected_subject)
             selected_commission = st.selectbox("Seleccione comisión:", commissions)
         else:
             selected_commission = "Todos"
@@ -87,82 +218,186 @@ if admin_option == "Generar Informes":
     # Generate report button
     if st.button("Generar Informe"):
         # Apply filters for the report
-        if selected_subject == "Todos":
-            subject_filter = None
-        else:
-            subject_filter = selected_subject
-            
-        if selected_commission == "Todos":
-            commission_filter = None
-        else:
-            commission_filter = selected_commission
+        report_filters = (
+            ("date", report_date_str),
+            ("subject", selected_subject if selected_subject != "Todos" else None),
+            ("commission", selected_commission if selected_commission != "Todos" else None)
+        )
+        st.session_state.report_filters = report_filters
+    
+    report_filters = st.session_state.get('report_filters')
+    if report_filters:
+        filters = dict(report_filters)
+        version = get_attendance_version()
         
         # Get filtered attendance data
-        attendance_data = get_attendance_report(
-            date=report_date_str,
-            subject=subject_filter,
-            commission=commission_filter
-        )
+        attendance_data = get_attendance_report_cached(version, report_filters)
+        
+        snapshot_versions = data_version()
+        absences = get_absence_roster_cached(version, snapshot_versions, report_absence_filters(report_filters))
         
-        if attendance_data.empty:
-            st.warning(f"No hay registros de asistencia para la fecha {report_date_str} con los filtros seleccionados.")
+        if attendance_data.empty and absences.empty:
+            st.warning(f"No hay registros de asistencia para la fecha {filters['date']} con los filtros seleccionados.")
         else:
             # Display the report
-            st.subheader(f"Informe de Asistencia - {report_date_str}")
+            st.subheader(f"Informe de Asistencia - {filters['date']}")
             st.dataframe(attendance_data)
             
-            # Export to Excel
-            excel_buffer = BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                attendance_data.to_excel(writer, index=False, sheet_name="Asistencia")
+            st.subheader(f"Ausentes ({len(absences)})")
+            st.dataframe(absences, hide_index=True)
             
-            excel_data = excel_buffer.getvalue()
+            # El archivo se genera solo cuando se pide, y queda cacheado por versión y filtros
+            report_format = st.radio("Formato:", available_formats(), horizontal=True, key="report_format")
+            if st.button("Preparar descarga del informe"):
+                st.session_state.report_export = (version, report_filters, report_format)
             
-            # Create download button
-            report_filename = f"asistencia_{report_date_str}"
-            if subject_filter:
-                report_filename += f"_{subject_filter}"
-            if commission_filter:
-                report_filename += f"_{commission_filter}"
-            report_filename += ".xlsx"
-            
-            st.download_button(
-                label="Descargar Informe Excel",
-                data=excel_data,
-                file_name=report_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            if st.session_state.get('report_export') == (version, report_filters, report_format):
+                extension, mime = EXPORT_FORMATS[report_format]
+                
+                # Create download button
+                report_name = f"asistencia_{filters['date']}"
+                if filters['subject']:
+                    report_name += f"_{filters['subject']}"
+                if filters['commission']:
+                    report_name += f"_{filters['commission']}"
+                report_filename = f"{report_name}.{extension}"
+                background = len(attendance_data) > BACKGROUND_EXPORT_THRESHOLD
+                
+                if background:
+                    # Informe muy grande: se exporta en segundo plano
+                    request_export_job(
+                        ("report", version, report_filters, report_format),
+                        f"Informe {filters['date']}",
+                        (attendance_data.iloc[i:i + EXPORT_CHUNK_SIZE]
+                         for i in range(0, len(attendance_data), EXPORT_CHUNK_SIZE)),
+                        len(attendance_data), report_format, report_filename
+                    )
+                else:
+                    st.download_button(
+                        label=f"Descargar Informe {report_format}",
+                        data=build_report_export(version, snapshot_versions, report_filters, report_format),
+                        file_name=report_filename,
+                        mime=mime
+                    )
+                
+                # Solo el Excel incluye la hoja de ausentes (y la exportación en segundo plano
+                # escribe solo la asistencia): en los demás casos se descargan en otro archivo
+                if not absences.empty and (background or report_format not in MULTI_SHEET_FORMATS):
+                    st.caption(f"El archivo {report_format} contiene solo la asistencia; "
+                               "los ausentes se descargan por separado.")
+                    st.download_button(
+                        label=f"Descargar Ausentes {report_format}",
+                        data=build_absence_export(
+                            version, snapshot_versions, report_absence_filters(report_filters), report_format
+                        ),
+                        file_name=f"{report_name}_ausentes.{extension}",
+                        mime=mime
+                    )
+    
+    # Ausentes de todas las sesiones de un período (por ejemplo, un cuatrimestre)
+    st.header("Ausentes por Período")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        today = datetime.datetime.now().date()
+        absence_period = st.date_input(
+            "Período",
+            (today.replace(day=1), today),
+            key="absence_period"
+        )
+    with col2:
+        absence_subject = st.selectbox("Materia:", ["Todas"] + get_subjects(), key="absence_subject")
+        if absence_subject != "Todas":
+            absence_commission = st.selectbox(
+                "Comisión:", ["Todas"] + get_commissions(absence_subject), key="absence_commission"
             )
+        else:
+            absence_commission = "Todas"
+    
+    if st.button("Calcular Ausentes"):
+        if len(absence_period) == 2:
+            st.session_state.absence_filters = (
+                ("date_from", absence_period[0].strftime('%Y-%m-%d')),
+                ("date_to", absence_period[1].strftime('%Y-%m-%d')),
+                ("subject", absence_subject if absence_subject != "Todas" else None),
+                ("commission", absence_commission if absence_commission != "Todas" else None)
+            )
+        else:
+            st.error("Seleccione la fecha de inicio y de fin del período")
+    
+    absence_filters = st.session_state.get('absence_filters')
+    if absence_filters:
+        filters = dict(absence_filters)
+        version = get_attendance_version()
+        snapshot_versions = data_version()
+        absences = get_absence_roster_cached(version, snapshot_versions, absence_filters)
+        
+        if absences.empty:
+            st.success(f"No hay ausentes entre {filters['date_from']} y {filters['date_to']}.")
+        else:
+            st.caption(f"{len(absences)} ausencias entre {filters['date_from']} y {filters['date_to']}")
+            st.dataframe(absences.head(HISTORY_PREVIEW_ROWS), hide_index=True)
+            
+            absence_format = st.radio("Formato:", available_formats(), horizontal=True, key="absence_format")
+            if st.button("Preparar descarga de ausentes"):
+                st.session_state.absence_export = (version, absence_filters, absence_format)
+            
+            if st.session_state.get('absence_export') == (version, absence_filters, absence_format):
+                extension, mime = EXPORT_FORMATS[absence_format]
+                st.download_button(
+                    label=f"Descargar Ausentes {absence_format}",
+                    data=build_absence_export(version, snapshot_versions, absence_filters, absence_format),
+                    file_name=f"ausentes_{filters['date_from']}_{filters['date_to']}.{extension}",
+                    mime=mime
+                )
     
     # Also add a section to view all historical attendance
     st.header("Historial Completo de Asistencia")
-    attendance_df = load_attendance()
+    version = get_attendance_version()
+    total_rows = version[0]
     
-    if attendance_df.empty:
+    if total_rows == 0:
         st.info("No hay registros de asistencia en el sistema.")
     else:
-        # Add a download button for all attendance
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            attendance_df.to_excel(writer, index=False, sheet_name="Asistencia")
-        
-        excel_data = excel_buffer.getvalue()
-        
         col1, col2 = st.columns([3, 1])
         with col1:
-            st.dataframe(attendance_df)
+            # Solo los últimos registros: el historial completo se descarga a pedido
+            st.caption(f"Últimos {HISTORY_PREVIEW_ROWS} registros de {total_rows}")
+            st.dataframe(get_latest_attendance_cached(version))
         with col2:
-            st.download_button(
-                label="Descargar Historial Completo",
-                data=excel_data,
-                file_name="historial_asistencia_completo.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            history_format = st.radio("Formato:", available_formats(), key="history_format")
+            if st.button("Preparar Historial Completo"):
+                st.session_state.history_export = (version, history_format)
+            
+            if st.session_state.get('history_export') == (version, history_format):
+                extension, mime = EXPORT_FORMATS[history_format]
+                
+                if total_rows > BACKGROUND_EXPORT_THRESHOLD:
+                    # Exportación muy grande: se genera en segundo plano
+                    request_export_job(
+                        ("history", version, history_format),
+                        "Historial completo",
+                        iter_attendance_chunks(chunk_size=EXPORT_CHUNK_SIZE),
+                        total_rows, history_format, f"historial_asistencia_completo.{extension}"
+                    )
+                else:
+                    st.download_button(
+                        label="Descargar Historial Completo",
+                        data=build_history_export(version, history_format),
+                        file_name=f"historial_asistencia_completo.{extension}",
+                        mime=mime
+                    )
+    
+    # Estado de las exportaciones en segundo plano
+    st.header("Exportaciones en Segundo Plano")
+    export_jobs_panel()
 
 elif admin_option == "Verificar Conflictos":
     st.header("Verificación de Conflictos en Horarios")
+    load_view('admin_schedules')
     
     # Check for conflicts in the schedule
-    conflicts = check_schedule_conflicts()
+    conflicts = get_schedule_conflicts()
     
     if conflicts:
         st.error(f"Se encontraron {len(conflicts)} conflictos en los horarios de las materias:")
@@ -180,7 +415,7 @@ elif admin_option == "Verificar Conflictos":
     
     # Show current schedule
     st.subheader("Horarios Actuales")
-    schedule_df = load_schedule()
+    schedule_df = get_schedule()
     st.dataframe(schedule_df)
     
     # Option to modify schedule
@@ -193,41 +428,55 @@ elif admin_option == "Verificar Conflictos":
 
 elif admin_option == "Configuración del Sistema":
     st.header("Configuración del Sistema")
+    load_view('configuration')
     
-    admin_config = load_admin_config()
+    admin_config = get_admin_config()
     
     # IP Range Configuration
     st.subheader("Configuración de Rango de IP")
     
-    current_ip = get_local_ip()
-    st.info(f"Su dirección IP actual es: {current_ip}")
+    current_ip = client_ip_from_context(
+        st.context, admin_config.get("trusted_proxies") or DEFAULT_TRUSTED_PROXIES
+    )
+    if current_ip is None:
+        st.warning("No se pudo determinar su dirección IP: la cabecera X-Forwarded-For tiene valores inválidos")
+    else:
+        st.info(f"Su dirección IP actual es: {current_ip}")
     
     ip_ranges = admin_config.get("allowed_ip_ranges", ["192.168.1.0/24"])
     
+    if is_ip_in_allowed_range(current_ip, ip_ranges):
+        st.caption("Su dirección IP está dentro de los rangos permitidos.")
+    
     # Display current IP ranges
     st.write("Rangos de IP permitidos actualmente:")
     for i, ip_range in enumerate(ip_ranges):
         st.code(ip_range)
     
+    # Rangos inválidos, duplicados o contenidos en otros
+    for ip_range, problem in analyze_ip_ranges(ip_ranges):
+        st.warning(f"{ip_range}: {problem}")
+    
     # Add new IP range
-    new_ip_range = st.text_input("Nuevo rango de IP (formato CIDR, ejemplo: 192.168.1.0/24):")
+    new_ip_range = st.text_input("Nuevo rango de IP (formato CIDR IPv4 o IPv6, ejemplo: 192.168.1.0/24):").strip()
     
     if st.button("Agregar Rango de IP"):
         if new_ip_range:
-            try:
-                # Validate CIDR notation
-                ipaddress.IPv4Network(new_ip_range, strict=False)
-                
-                if new_ip_range not in ip_ranges:
+            # Validate CIDR notation
+            if parse_ip_range(new_ip_range) is None:
+                st.error("Formato de CIDR inválido. Use el formato correcto (ejemplo: 192.168.1.0/24).")
+            else:
+                new_issues = [problem for ip_range, problem in analyze_ip_ranges(ip_ranges + [new_ip_range])
+                              if ip_range == new_ip_range]
+                if new_issues:
+                    st.warning(f"No se agregó {new_ip_range}: {new_issues[0]}.")
+                else:
                     ip_ranges.append(new_ip_range)
                     admin_config["allowed_ip_ranges"] = ip_ranges
                     save_admin_config(admin_config)
+                    invalidate('admin_config')
                     st.success(f"Rango de IP {new_ip_range} agregado correctamente.")
                     st.rerun()
-                else:
-                    st.warning("Este rango de IP ya está en la lista.")
-            except ValueError:
-                st.error("Formato de CIDR inválido. Use el formato correcto (ejemplo: 192.168.1.0/24).")
     
     # Administrator credentials
     st.subheader("Credenciales de Administrador")
@@ -241,4 +490,5 @@ elif admin_option == "Configuración del Sistema":
             admin_config["admin_password"] = admin_password
         
         save_admin_config(admin_config)
+        invalidate('admin_config')
         st.success("Credenciales de administrador actualizadas.")
@@ -0,0 +1,311 @@
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from io import BytesIO
+
+# cv2, numpy, qrcode, PIL y pyzbar se importan en el primer uso: la mayoría de las
+# sesiones no escanea ni genera códigos y no debería pagar su tiempo de carga
+
+@lru_cache(maxsize=1)
+def get_zbar_decode():
+    """
+    Función decode de pyzbar, o None si no está disponible
+    pyzbar depende de la librería nativa libzbar (packages.txt); sin ella se usa solo OpenCV
+    """
+    try:
+        from pyzbar.pyzbar import decode
+    except ImportError:
+        return None
+    return decode
+
+# Lado máximo (en píxeles) al que se reduce la foto antes de decodificar
+MAX_DECODE_SIDE = 1024
+
+# Pool de procesos para decodificar fuera del hilo del script de Streamlit
+DECODE_POOL_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+# Máximo de decodificaciones en cola o en curso antes de rechazar nuevas
+DECODE_MAX_PENDING = DECODE_POOL_WORKERS * 4
+# Tiempo máximo de espera por decodificación (segundos)
+DECODE_TIMEOUT_SECONDS = 5
+
+# Cantidad de imágenes QR renderizadas que se mantienen en memoria
+QR_CACHE_SIZE = 256
+# Hilos usados para renderizar QR en lote
+QR_BATCH_WORKERS = 4
+
+def _adaptive_gaussian(img):
+    import cv2
+    return cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+def _adaptive_mean(img):
+    import cv2
+    return cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 31, 10)
+
+def _otsu(img):
+    import cv2
+    return cv2.threshold(cv2.GaussianBlur(img, (5, 5), 0), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+# Variantes de umbral que se prueban, en orden, si las etapas directas fallan
+THRESHOLD_VARIANTS = (
+    ('adaptive_gaussian', _adaptive_gaussian),
+    ('adaptive_mean', _adaptive_mean),
+    ('otsu', _otsu),
+)
+
+def _decode_pyzbar(img):
+    zbar_decode = get_zbar_decode()
+    if zbar_decode is None:
+        return None
+    decoded_objects = zbar_decode(img)
+    if decoded_objects:
+        return decoded_objects[0].data.decode('utf-8')
+    return None
+
+def _decode_opencv(img):
+    import cv2
+    data, points, _ = cv2.QRCodeDetector().detectAndDecode(img)
+    return data or None
+
+def _decode_threshold(img, variant):
+    binary = variant(img)
+    return _decode_pyzbar(binary) or _decode_opencv(binary)
+
+def decode_qr_image(image_bytes, max_side=MAX_DECODE_SIDE):
+    """
+    Decodificar un código QR a partir de los bytes de una imagen
+    Etapas: decodificación única en escala de grises, reducción de tamaño,
+    pyzbar, QRCodeDetector de OpenCV y variantes de umbral.
+    Se detiene en la primera etapa que encuentra el código.
+    Returns:
+        tuple (contenido del QR o None, etapa que lo decodificó o None, dict de tiempos en ms)
+    """
+    import cv2
+    import numpy as np
+
+    timings = {}
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[stage] = (time.perf_counter() - start) * 1000
+        return result
+
+    img = timed('decode', cv2.imdecode, np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None, None, timings
+
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1:
+        img = timed('downscale', cv2.resize, img, (int(width * scale), int(height * scale)),
+                    None, 0, 0, cv2.INTER_AREA)
+
+    stages = [('pyzbar', _decode_pyzbar, ()), ('opencv', _decode_opencv, ())]
+    stages += [(f'threshold_{name}', _decode_threshold, (variant,)) for name, variant in THRESHOLD_VARIANTS]
+
+    for stage, func, extra_args in stages:
+        if stage == 'pyzbar' and get_zbar_decode() is None:
+            continue
+        qr_data = timed(stage, func, img, *extra_args)
+        if qr_data:
+            return qr_data, stage, timings
+
+    return None, None, timings
+
+def extract_classroom_code(qr_data):
+    """
+    Extraer el código de clase del contenido del QR
+    Los QR del panel tienen formato "CODIGO|MATERIA|COMISION"
+    """
+    return qr_data.split('|')[0]
+
+# Estado del pool compartido por todas las sesiones del proceso
+_pool = None
+_pool_lock = threading.Lock()
+_pending = 0
+_counters = {'submitted': 0, 'completed': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0}
+_latencies_ms = deque(maxlen=500)
+
+def _get_decode_pool():
+    global _pool
+    if _pool is None:
+        # spawn evita hacer fork de un proceso con varios hilos (servidor de Streamlit)
+        _pool = ProcessPoolExecutor(max_workers=DECODE_POOL_WORKERS,
+                                    mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def _discard_pool(pool):
+    """
+    Descartar un pool roto para que se cree uno nuevo, liberando sus procesos
+    Se llama sin el lock tomado: cancelar tareas pendientes ejecuta _task_finished
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _task_finished(future):
+    global _pending
+    with _pool_lock:
+        _pending -= 1
+
+def decode_qr_in_pool(image_bytes, timeout=DECODE_TIMEOUT_SECONDS):
+    """
+    Decodificar un QR en el pool de procesos (ver decode_qr_image)
+    Returns:
+        tuple (estado, contenido del QR o None, etapa o None, dict de tiempos)
+        estado: 'ok', 'not_found', 'saturated', 'timeout' o 'error'
+    """
+    global _pending
+    with _pool_lock:
+        if _pending >= DECODE_MAX_PENDING:
+            _counters['rejected'] += 1
+            return 'saturated', None, None, {}
+        pool = _get_decode_pool()
+        try:
+            future = pool.submit(decode_qr_image, image_bytes)
+        except (BrokenProcessPool, RuntimeError):
+            future = None
+            _counters['errors'] += 1
+        else:
+            _pending += 1
+            _counters['submitted'] += 1
+    if future is None:
+        # Un worker murió: descartar el pool para que se cree uno nuevo
+        _discard_pool(pool)
+        return 'error', None, None, {}
+    future.add_done_callback(_task_finished)
+
+    start = time.perf_counter()
+    try:
+        qr_data, stage, timings = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        with _pool_lock:
+            _counters['timeouts'] += 1
+        return 'timeout', None, None, {}
+    except BrokenProcessPool:
+        with _pool_lock:
+            _counters['errors'] += 1
+        _discard_pool(pool)
+        return 'error', None, None, {}
+    except Exception:
+        with _pool_lock:
+            _counters['errors'] += 1
+        return 'error', None, None, {}
+
+    with _pool_lock:
+        _counters['completed'] += 1
+        _latencies_ms.append((time.perf_counter() - start) * 1000)
+    return ('ok' if qr_data else 'not_found'), qr_data, stage, timings
+
+def get_decode_pool_metrics():
+    """Métricas del pool de decodificación: cola, contadores y latencia (ms)"""
+    with _pool_lock:
+        latencies = sorted(_latencies_ms)
+        metrics = dict(_counters)
+        metrics.update({
+            'workers': DECODE_POOL_WORKERS,
+            'queue_length': _pending,
+            'max_pending': DECODE_MAX_PENDING,
+        })
+
+    def percentile(pct):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))], 1)
+
+    metrics['latency_p50_ms'] = percentile(50)
+    metrics['latency_p95_ms'] = percentile(95)
+    return metrics
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr_png(data, box_size=10, border=4, error_correction='L'):
+    """
+    Generar la imagen PNG de un código QR
+    Cacheada por contenido y opciones de renderizado: los reruns no vuelven a generarla
+    error_correction: 'L', 'M', 'Q' o 'H'
+    """
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{error_correction}"),
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    
+    img = qr.make_image(fill_color="black", back_color="white")
+    
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+def render_qr_batch(payloads, **options):
+    """
+    Generar varios códigos QR en paralelo (ver render_qr_png)
+    Returns:
+        list de PNG en el mismo orden que payloads
+    """
+    with ThreadPoolExecutor(max_workers=QR_BATCH_WORKERS) as executor:
+        return list(executor.map(lambda data: render_qr_png(data, **options), payloads))
+
+def build_qr_zip(items):
+    """
+    Empaquetar códigos QR en un ZIP
+    Parameters:
+        items (list): tuplas (nombre de archivo, PNG)
+    """
+    buffered = BytesIO()
+    with zipfile.ZipFile(buffered, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for file_name, png in items:
+            archive.writestr(file_name, png)
+    return buffered.getvalue()
+
+def build_qr_sheet_pdf(items, columns=2, rows=3):
+    """
+    Armar una hoja imprimible (PDF A4) con varios códigos QR y su leyenda
+    Parameters:
+        items (list): tuplas (leyenda, PNG)
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    # A4 a 150 dpi
+    page_width, page_height = 1240, 1754
+    margin = 60
+    cell_width = (page_width - 2 * margin) // columns
+    cell_height = (page_height - 2 * margin) // rows
+    caption_height = 90
+    qr_side = min(cell_width, cell_height - caption_height) - 20
+    font = ImageFont.load_default(size=26)
+
+    pages = []
+    per_page = columns * rows
+    for page_start in range(0, len(items), per_page):
+        page = Image.new('RGB', (page_width, page_height), 'white')
+        draw = ImageDraw.Draw(page)
+        for position, (caption, png) in enumerate(items[page_start:page_start + per_page]):
+            column, row = position % columns, position // columns
+            x = margin + column * cell_width
+            y = margin + row * cell_height
+            qr_img = Image.open(BytesIO(png)).convert('RGB').resize((qr_side, qr_side), Image.NEAREST)
+            page.paste(qr_img, (x + (cell_width - qr_side) // 2, y))
+            for line_number, line in enumerate(caption.split('\n')):
+                draw.text((x + cell_width // 2, y + qr_side + 10 + line_number * 32), line,
+                          fill='black', font=font, anchor='ma')
+        pages.append(page)
+
+    if not pages:
+        return b''
+    buffered = BytesIO()
+    pages[0].save(buffered, format='PDF', save_all=True, append_images=pages[1:], resolution=150)
+    return buffered.getvalue()
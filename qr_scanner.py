@@ -0,0 +1,18 @@
+from pathlib import Path
+
+import streamlit.components.v1 as components
+
+# Componente HTML estático: decodifica el QR en el navegador desde la cámara en vivo
+_qr_scanner_component = components.declare_component(
+    "qr_scanner",
+    path=str(Path(__file__).parent / "components" / "qr_scanner")
+)
+
+def qr_scanner(key=None):
+    """
+    Escanear un código QR con la cámara del navegador
+    Solo se envía al servidor el contenido decodificado, no la imagen
+    Returns:
+        str con el contenido del QR ("CODIGO|MATERIA|COMISION") o None si todavía no se leyó
+    """
+    return _qr_scanner_component(key=key, default=None)
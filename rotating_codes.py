@@ -0,0 +1,91 @@
+import hashlib
+import hmac
+import os
+import string
+import struct
+import time
+
+import streamlit as st
+
+# Mismo formato que los códigos guardados en classroom_codes: 6 caracteres alfanuméricos
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+# Cada cuántos segundos cambia el código mostrado por el profesor
+ROTATION_STEP_SECONDS = 60
+# Ventanas adyacentes aceptadas (tolerancia de reloj y tiempo de escaneo)
+ACCEPTED_WINDOWS = 1
+
+def get_master_secret():
+    """
+    Obtener el secreto maestro de los códigos rotativos
+    Se configura como CLASSROOM_CODE_SECRET en secrets o en variables de entorno
+    Returns:
+        bytes o None si el modo rotativo no está configurado
+    """
+    secret = None
+    try:
+        if hasattr(st, 'secrets') and 'CLASSROOM_CODE_SECRET' in st.secrets:
+            secret = st.secrets["CLASSROOM_CODE_SECRET"]
+    except Exception:
+        secret = None
+
+    if not secret:
+        secret = os.environ.get("CLASSROOM_CODE_SECRET")
+
+    return secret.encode('utf-8') if secret else None
+
+def is_rotating_mode_enabled():
+    """Verificar si hay un secreto configurado para los códigos rotativos"""
+    return get_master_secret() is not None
+
+def commission_secret(master_secret, subject, commission):
+    """Derivar el secreto de una comisión a partir del secreto maestro"""
+    return hmac.new(master_secret, f"{subject}|{commission}".encode('utf-8'), hashlib.sha256).digest()
+
+def code_for_step(secret, step):
+    """
+    Calcular el código de una ventana de tiempo (truncamiento dinámico estilo TOTP, RFC 4226)
+    """
+    digest = hmac.new(secret, struct.pack('>Q', step), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    value = struct.unpack('>I', digest[offset:offset + 4])[0] & 0x7FFFFFFF
+
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, index = divmod(value, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[index])
+    return ''.join(chars)
+
+def current_rotating_code(subject, commission, now=None):
+    """
+    Código vigente para una materia y comisión
+    Returns:
+        tuple (código, segundos hasta el próximo cambio) o (None, None) si no está configurado
+    """
+    master_secret = get_master_secret()
+    if master_secret is None:
+        return None, None
+
+    now = time.time() if now is None else now
+    step = int(now // ROTATION_STEP_SECONDS)
+    remaining = int(ROTATION_STEP_SECONDS - (now % ROTATION_STEP_SECONDS))
+    return code_for_step(commission_secret(master_secret, subject, commission), step), remaining
+
+def verify_rotating_code(code, subject, commission, now=None, windows=ACCEPTED_WINDOWS):
+    """
+    Verificar un código rotativo recalculando el HMAC de la ventana actual y las adyacentes
+    No consulta la base de datos
+    """
+    master_secret = get_master_secret()
+    if master_secret is None or not code:
+        return False
+
+    code = str(code).strip().upper()
+    secret = commission_secret(master_secret, subject, commission)
+    now = time.time() if now is None else now
+    step = int(now // ROTATION_STEP_SECONDS)
+
+    # Se calculan todas las ventanas para que el tiempo no dependa de cuál coincide
+    matches = [hmac.compare_digest(code, code_for_step(secret, step + delta))
+               for delta in range(-windows, windows + 1)]
+    return any(matches)
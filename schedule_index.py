@@ -0,0 +1,90 @@
+import bisect
+
+from utils import parse_date, parse_time
+
+# Índice de intervalos del horario por (fecha, comisión) para validar altas y cambios
+# sin recorrer toda la tabla. Cada grupo guarda los horarios ordenados por inicio y la
+# duración máxima del grupo: los únicos candidatos a superponerse con [inicio, fin] son
+# los que empiezan entre inicio - duración máxima y fin, que se ubican con bisect.
+
+def schedule_key(fecha, comision):
+    """Clave de grupo: la misma fecha en DD/MM/YYYY o ISO cae en el mismo grupo"""
+    date = parse_date(fecha) if isinstance(fecha, str) else fecha
+    if hasattr(date, 'isoformat'):
+        return (date.isoformat(), str(comision).strip())
+    return ('raw:' + str(fecha).strip(), str(comision).strip())
+
+def _seconds(value):
+    parsed = parse_time(value.strip()) if isinstance(value, str) else value
+    if not hasattr(parsed, 'hour'):
+        return None
+    return parsed.hour * 3600 + parsed.minute * 60 + parsed.second
+
+def build_schedule_index(schedule_df):
+    """Construir el índice a partir del horario cacheado"""
+    index = {'groups': {}, 'rows': {}}
+    for row in schedule_df.to_dict('records'):
+        add_to_schedule_index(index, row)
+    return index
+
+def add_to_schedule_index(index, row):
+    """
+    Agregar un horario (dict con id, MATERIA, COMISION, FECHA, INICIO, FINAL)
+    Los horarios con horas inválidas no se indexan
+    """
+    start, end = _seconds(row.get('INICIO')), _seconds(row.get('FINAL'))
+    row_id = row.get('id')
+    if start is None or end is None or row_id is None:
+        return False
+
+    key = schedule_key(row.get('FECHA'), row.get('COMISION'))
+    group = index['groups'].setdefault(key, {'starts': [], 'ids': [], 'max_length': 0})
+    position = bisect.bisect_right(group['starts'], start)
+    group['starts'].insert(position, start)
+    group['ids'].insert(position, row_id)
+    group['max_length'] = max(group['max_length'], end - start)
+    index['rows'][row_id] = dict(row, _key=key, _start=start, _end=end)
+    return True
+
+def remove_from_schedule_index(index, row_id):
+    """Quitar un horario del índice"""
+    row = index['rows'].pop(row_id, None)
+    if row is None:
+        return False
+
+    group = index['groups'][row['_key']]
+    position = bisect.bisect_left(group['starts'], row['_start'])
+    while group['ids'][position] != row_id:
+        position += 1
+    del group['starts'][position]
+    del group['ids'][position]
+    # max_length no se reduce: sigue siendo una cota válida para la búsqueda
+    return True
+
+def update_schedule_index(index, row):
+    """Reemplazar un horario existente por su versión modificada"""
+    remove_from_schedule_index(index, row.get('id'))
+    return add_to_schedule_index(index, row)
+
+def find_schedule_conflicts(index, fecha, comision, inicio, final, ignore_id=None):
+    """
+    Horarios de la misma fecha y comisión que se superponen con [inicio, final]
+    Mismo criterio que check_schedule_conflicts: los horarios que se tocan se superponen
+    Parameters:
+        ignore_id: id del horario que se está modificando, para no compararlo consigo mismo
+    Returns:
+        list de dicts con MATERIA, COMISION, FECHA, INICIO, FINAL e id
+    """
+    start, end = _seconds(inicio), _seconds(final)
+    group = index['groups'].get(schedule_key(fecha, comision))
+    if start is None or end is None or group is None:
+        return []
+
+    low = bisect.bisect_left(group['starts'], start - group['max_length'])
+    high = bisect.bisect_right(group['starts'], end)
+    conflicts = []
+    for row_id in group['ids'][low:high]:
+        row = index['rows'][row_id]
+        if row_id != ignore_id and row['_end'] >= start:
+            conflicts.append({column: row.get(column) for column in ['MATERIA', 'COMISION', 'FECHA', 'INICIO', 'FINAL', 'id']})
+    return conflicts
@@ -1,5 +1,7 @@
 import pandas as pd
+import numpy as np
 import datetime
+import heapq
 import os
 
 def parse_time(time_str):
@@ -124,6 +126,221 @@ def validate_time_for_subject(current_date, current_time, schedule_date, start_t
     # Agregamos 15 minutos de tolerancia al final
     return start_minutes <= current_minutes <= (end_minutes + 15)
 
+# Formatos aceptados por las versiones vectorizadas (mismos que parse_date/parse_time)
+_DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d')
+_TIME_PATTERN = r'^\s*(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?\s*$'
+
+def _factorize(values):
+    """
+    Códigos y valores únicos de una columna: un horario o una tabla de asistencia repite
+    pocas fechas y horas, así que se parsean solo los únicos y se expanden con los códigos
+    Los valores nulos quedan con código -1
+    """
+    series = pd.Series(values, copy=False)
+    codes, uniques = pd.factorize(series)
+    return series.index, codes, pd.Series(uniques)
+
+def _parse_unique_dates(values):
+    values = values.astype(str).str.strip()
+    # Un to_datetime por formato; errors='coerce' descarta fechas imposibles (ej: 31/02/2025)
+    dates = pd.to_datetime(values, format=_DATE_FORMATS[0], errors='coerce')
+    for date_format in _DATE_FORMATS[1:]:
+        dates = dates.fillna(pd.to_datetime(values, format=date_format, errors='coerce'))
+    return dates
+
+def parse_date_series(date_values):
+    """
+    Versión vectorizada de parse_date para una columna completa
+    Acepta DD/MM/YYYY y YYYY-MM-DD mezclados en la misma columna
+    Returns:
+        pd.Series datetime64 con NaT para valores inválidos o no reconocidos
+    """
+    index, codes, uniques = _factorize(date_values)
+    parsed = _parse_unique_dates(uniques).to_numpy()
+    # El código -1 (nulo) toma el NaT agregado al final
+    parsed = np.append(parsed, np.array(['NaT'], dtype=parsed.dtype))
+    return pd.Series(parsed[codes], index=index)
+
+def parse_time_series(time_values):
+    """
+    Versión vectorizada de parse_time para una columna completa (HH:MM o HH:MM:SS)
+    Returns:
+        np.ndarray float con los segundos desde medianoche, NaN si el valor es inválido
+    """
+    _, codes, uniques = _factorize(time_values)
+    parts = uniques.astype(str).str.extract(_TIME_PATTERN).astype(float)
+    hours = parts[0].to_numpy()
+    minutes = parts[1].to_numpy()
+    seconds = parts[2].fillna(0).to_numpy()
+
+    valid = (hours < 24) & (minutes < 60) & (seconds < 60)
+    total = np.where(valid, hours * 3600 + minutes * 60 + seconds, np.nan)
+    # El código -1 (nulo) toma el NaN agregado al final
+    return np.append(total, np.nan)[codes]
+
+def validate_time_for_subject_batch(schedule_dates, start_times, end_times, now):
+    """
+    Versión vectorizada de validate_time_for_subject para columnas completas del horario
+    Parameters:
+        schedule_dates: columna FECHA (YYYY-MM-DD o DD/MM/YYYY, mezclados)
+        start_times: columna INICIO (HH:MM o HH:MM:SS)
+        end_times: columna FINAL (HH:MM o HH:MM:SS)
+        now (datetime.datetime): fecha y hora actual en Argentina
+    Returns:
+        np.ndarray de bool, True en las filas cuyo horario está habilitado ahora
+    """
+    dates = parse_date_series(schedule_dates)
+    same_day = (dates == pd.Timestamp(now.date())).to_numpy()
+
+    # Igual que la versión escalar: se comparan minutos, ignorando los segundos
+    start_minutes = parse_time_series(start_times) // 60
+    end_minutes = parse_time_series(end_times) // 60
+    current_minutes = now.hour * 60 + now.minute
+
+    with np.errstate(invalid='ignore'):
+        in_range = (start_minutes <= current_minutes) & (current_minutes <= end_minutes + 15)
+    return same_day & in_range
+
+def build_class_times(schedule_df):
+    """
+    Horarios ya parseados por clase, para validar sin volver a leer las columnas de texto
+    Returns:
+        dict {(materia, comision): [(fecha, minuto de inicio, minuto de fin), ...]}
+        Las filas con fecha u hora inválidas se omiten (validate_time_for_subject las rechaza)
+    """
+    class_times = {}
+    if schedule_df.empty:
+        return class_times
+
+    # Las fechas se convierten a datetime.date una vez por valor distinto
+    _, date_codes, unique_dates = _factorize(schedule_df['FECHA'])
+    dates = [None if pd.isna(date) else date.date() for date in _parse_unique_dates(unique_dates)]
+    dates.append(None)
+    start_minutes = parse_time_series(schedule_df['INICIO']) // 60
+    end_minutes = parse_time_series(schedule_df['FINAL']) // 60
+
+    valid = ~np.isnan(start_minutes) & ~np.isnan(end_minutes)
+    rows = zip(
+        schedule_df['MATERIA'].to_numpy()[valid], schedule_df['COMISION'].to_numpy()[valid],
+        date_codes[valid].tolist(), start_minutes[valid].astype(int).tolist(), end_minutes[valid].astype(int).tolist()
+    )
+    for subject, commission, date_code, start, end in rows:
+        date = dates[date_code]
+        if date is not None:
+            class_times.setdefault((subject, commission), []).append((date, start, end))
+    return class_times
+
+def is_class_open(class_times, now):
+    """
+    Mismo criterio que validate_time_for_subject sobre los horarios de build_class_times
+    Parameters:
+        class_times: lista de (fecha, minuto de inicio, minuto de fin) de una clase
+        now (datetime.datetime): fecha y hora actual en Argentina
+    """
+    today = now.date()
+    current_minutes = now.hour * 60 + now.minute
+    return any(
+        date == today and start <= current_minutes <= end + 15
+        for date, start, end in class_times
+    )
+
+def classes_on_date(schedule_df, date):
+    """
+    Materias y comisiones que tienen clase en la fecha indicada
+    Returns:
+        list ordenada de tuplas (materia, comision)
+    """
+    if schedule_df.empty:
+        return []
+    on_date = schedule_df[(parse_date_series(schedule_df['FECHA']) == pd.Timestamp(date)).to_numpy()]
+    return sorted(set(zip(on_date['MATERIA'], on_date['COMISION'])))
+
+def build_dni_index(dni_values):
+    """
+    Construye el índice de búsqueda por prefijo de DNI
+    Returns:
+        tuple ordenada de DNIs únicos como strings
+    """
+    return tuple(sorted(set(str(dni).strip() for dni in dni_values if pd.notna(dni))))
+
+def search_dni_prefix(dni_index, prefix, limit=5):
+    """
+    Busca los DNIs que comienzan con el prefijo indicado
+    Usa búsqueda binaria sobre el índice ordenado: O(log n + limit)
+    Returns:
+        list con como máximo `limit` DNIs
+    """
+    from bisect import bisect_left
+
+    prefix = str(prefix).strip()
+    if not prefix:
+        return []
+
+    matches = []
+    position = bisect_left(dni_index, prefix)
+    while position < len(dni_index) and len(matches) < limit:
+        dni = dni_index[position]
+        if not dni.startswith(prefix):
+            break
+        matches.append(dni)
+        position += 1
+    return matches
+
+def frame_memory_bytes(df):
+    """Memoria real ocupada por un DataFrame, incluyendo los strings"""
+    return int(df.memory_usage(deep=True).sum())
+
+def _compact_dni(series):
+    # DNI numéricos a int64; si hay alguno no numérico se deja como categoría
+    numeric = pd.to_numeric(series, errors='coerce')
+    if numeric.notna().all() and (numeric % 1 == 0).all():
+        return numeric.astype('int64')
+    return series.astype('category')
+
+def _compact_categories(df, columns):
+    # Solo conviene si los valores se repiten: con valores casi únicos la categoría ocupa más
+    for column in columns:
+        if column in df.columns and df[column].nunique(dropna=False) <= len(df) // 2:
+            df[column] = df[column].astype('category')
+
+def compact_students_df(students_df):
+    """
+    Representación compacta de la tabla de estudiantes
+    dni a int64 y los strings repetidos (nombre, materia, comisión, tecnicatura) a categorías
+    """
+    df = students_df.copy()
+    if 'dni' in df.columns:
+        df['dni'] = _compact_dni(df['dni'])
+    _compact_categories(df, ['apellido_nombre', 'tecnicatura', 'materia', 'comision'])
+    return df
+
+def compact_attendance_df(attendance_df):
+    """
+    Representación compacta de la tabla de asistencia
+    DNI a int64, FECHA a datetime64 (día), HORA a minuto del día (int16)
+    y los strings repetidos a categorías
+    """
+    df = attendance_df.copy()
+    if 'DNI' in df.columns:
+        df['DNI'] = _compact_dni(df['DNI'])
+    if 'FECHA' in df.columns:
+        df['FECHA'] = parse_date_series(df['FECHA']).astype('datetime64[s]')
+    if 'HORA' in df.columns:
+        minutes = pd.Series(parse_time_series(df['HORA']) // 60, index=df.index)
+        df['HORA'] = minutes.astype('int16') if minutes.notna().all() else minutes.astype('Int16')
+    _compact_categories(df, ['APELLIDO Y NOMBRE', 'MATERIA', 'COMISION', 'DISPOSITIVO', 'IP', 'DEVICE_ID'])
+    return df
+
+def dni_mask(dni_series, dni):
+    """
+    Máscara de filas con el DNI indicado
+    Con la columna compacta (int64) es una comparación entera, sin convertir a string
+    """
+    dni = str(dni).strip()
+    if pd.api.types.is_integer_dtype(dni_series):
+        return dni_series == int(dni) if dni.isdigit() else pd.Series(False, index=dni_series.index)
+    return dni_series.astype(str) == dni
+
 def is_attendance_registered(attendance_df, dni, subject, date):
     """Check if attendance is already registered for this subject and date"""
     # Convert date to string for comparison if it's not already
@@ -226,82 +443,81 @@ def save_attendance(dni, name, subject, commission, date, time, device, ip, devi
     
     return True
 
-def check_schedule_conflicts():
+def find_schedule_overlaps(schedule_df):
     """
-    Check if there are any conflicts in the schedule (same subject at overlapping times)
-    Returns a list of conflict dictionaries
+    Pares de filas (posiciones i < j) con la misma fecha y comisión y horarios superpuestos
+    Barrido por grupo (fecha, comisión) ordenado por hora de inicio: O(n log n + conflictos)
+    Los horarios que se tocan (uno termina cuando empieza el otro) cuentan como superpuestos
     """
+    if schedule_df.empty:
+        return []
+
+    starts = parse_time_series(schedule_df['INICIO'])
+    ends = parse_time_series(schedule_df['FINAL'])
+    # Fechas en cualquiera de los dos formatos; las no reconocidas se agrupan por el texto original
+    dates = parse_date_series(schedule_df['FECHA'])
+    date_keys = dates.dt.strftime('%Y-%m-%d').where(dates.notna(), 'raw:' + schedule_df['FECHA'].astype(str))
+
+    order = pd.DataFrame({
+        'date': date_keys.to_numpy(),
+        'commission': schedule_df['COMISION'].astype(str).to_numpy(),
+        'start': starts,
+        'end': ends,
+        'position': np.arange(len(schedule_df)),
+    }).dropna(subset=['start', 'end']).sort_values(['date', 'commission', 'start', 'position'])
+
+    pairs = []
+    active = []  # heap de (fin, posición, inicio) de los horarios abiertos del grupo actual
+    current_group = None
+    for date, commission, start, end, position in order.itertuples(index=False, name=None):
+        if (date, commission) != current_group:
+            current_group = (date, commission)
+            active = []
+        # Los que terminan antes de este inicio no se superponen con este ni con los siguientes
+        while active and active[0][0] < start:
+            heapq.heappop(active)
+        for _, other, other_start in active:
+            if other_start <= end:
+                pairs.append((min(position, other), max(position, other)))
+        heapq.heappush(active, (end, position, start))
+
+    pairs.sort()
+    return pairs
+
+def check_schedule_conflicts(schedule_df=None):
     """
-    Verificación mejorada de conflictos en horarios
-    Considera fecha + comisión + horarios
+    Check if there are any conflicts in the schedule (same subject at overlapping times)
+    Returns a list of conflict dictionaries
     """
     """
     Verificación mejorada de conflictos en horarios
     Considera fecha + comisión + horarios
+    Si no se pasa schedule_df se carga el horario desde la base de datos
     """
-    from database import load_schedule
-    schedule_df = load_schedule()
-    conflicts = []
-    
-    # Convertir strings de tiempo a objetos datetime.time
-    def convert_time(time_str):
-        if isinstance(time_str, str):
-            try:
-                hour, minute, second = map(int, time_str.split(':'))
-                return datetime.time(hour, minute, second)
-            except ValueError:
-                return None
-        return time_str
-    
-    # Convertir strings de fecha a objetos datetime.date
-    def convert_date(date_str):
-        if isinstance(date_str, str):
-            try:
-                if '/' in date_str:  # DD/MM/YYYY
-                    day, month, year = map(int, date_str.split('/'))
-                    return datetime.date(year, month, day)
-                elif '-' in date_str:  # YYYY-MM-DD
-                    year, month, day = map(int, date_str.split('-'))
-                    return datetime.date(year, month, day)
-            except ValueError:
-                return None
-        return date_str
-    
-    # Aplicar conversiones
-    schedule_df['INICIO_OBJ'] = schedule_df['INICIO'].apply(convert_time)
-    schedule_df['FINAL_OBJ'] = schedule_df['FINAL'].apply(convert_time)
-    schedule_df['FECHA_OBJ'] = schedule_df['FECHA'].apply(convert_date)
-    
-    # Verificar cada par de horarios
-    for i, row1 in schedule_df.iterrows():
-        for j, row2 in schedule_df.iterrows():
-            if i < j:  # Verificar cada par solo una vez
-                # Verificar si las fechas son iguales
-                if row1['FECHA_OBJ'] == row2['FECHA_OBJ']:
-                    # Verificar comisiones iguales
-                    same_commission = row1['COMISION'] == row2['COMISION']
-                    
-                    if same_commission:
-                        # Verificar superposición de horarios
-                        row1_start = row1['INICIO_OBJ'] 
-                        row1_end = row1['FINAL_OBJ']
-                        row2_start = row2['INICIO_OBJ']
-                        row2_end = row2['FINAL_OBJ']
-                        
-                        if (row1_start <= row2_end and row1_end >= row2_start):
-                            conflicts.append({
-                                'materia1': row1['MATERIA'],
-                                'comision1': row1['COMISION'],
-                                'fecha1': row1['FECHA'],
-                                'inicio1': row1['INICIO'],
-                                'final1': row1['FINAL'],
-                                'materia2': row2['MATERIA'],
-                                'comision2': row2['COMISION'],
-                                'fecha2': row2['FECHA'],
-                                'inicio2': row2['INICIO'],
-                                'final2': row2['FINAL']
-                            })
-    return conflicts
+    if schedule_df is None:
+        from database import load_schedule
+        schedule_df = load_schedule()
+
+    pairs = find_schedule_overlaps(schedule_df)
+    if not pairs:
+        return []
+
+    columns = {column: schedule_df[column].tolist() for column in ['MATERIA', 'COMISION', 'FECHA', 'INICIO', 'FINAL']}
+    return [
+        {
+            'materia1': columns['MATERIA'][i],
+            'comision1': columns['COMISION'][i],
+            'fecha1': columns['FECHA'][i],
+            'inicio1': columns['INICIO'][i],
+            'final1': columns['FINAL'][i],
+            'materia2': columns['MATERIA'][j],
+            'comision2': columns['COMISION'][j],
+            'fecha2': columns['FECHA'][j],
+            'inicio2': columns['INICIO'][j],
+            'final2': columns['FINAL'][j]
+        }
+        for i, j in pairs
+    ]
 
 # Añadir a utils.py
 def detect_mobile_device():